@@ -0,0 +1,43 @@
+import numpy as np
+
+from instance import take
+
+
+def aggregate_children(instance):
+    """Group interchangeable children (same country, same set of requests) into buckets.
+
+    Returns (aggregated instance, members). A bucket is a child entry whose child_count is
+    the number of children it stands for; it keeps the id of its first member and
+    members[i] lists the ids of the children behind entry i. Engines bound the bucket's
+    (child, factory) variables and its "at most one toy" row by the count instead of 1.
+    """
+    request_ptr, request_factory = instance.request_ptr, instance.request_factory
+    child_country = instance.child_country.tolist()
+    buckets = {}
+    for child, (start, end) in enumerate(zip(request_ptr[:-1].tolist(), request_ptr[1:].tolist())):
+        # Requests are stored sorted, so the raw bytes of a row identify its factory set
+        buckets.setdefault((child_country[child], request_factory[start:end].tobytes()), []).append(child)
+
+    groups = list(buckets.values())
+    first = np.fromiter((group[0] for group in groups), dtype=np.int64, count=len(groups))
+    order = np.argsort(first, kind="stable")
+    aggregated = take(instance, np.arange(len(instance.factory_ids)), np.arange(len(instance.country_ids)),
+                      first[order])
+    child_ids = instance.child_ids.tolist()
+    members = [[child_ids[child] for child in groups[group]] for group in order.tolist()]
+    counts = np.fromiter((len(group) for group in members), dtype=aggregated.child_count.dtype, count=len(members))
+    return aggregated._replace(child_count=counts), members
+
+
+def expand_assignment(members, assignment):
+    """Turn toys per (child or bucket, factory) into a child id -> factory id map.
+
+    members is the list from aggregate_children, or None when children were not aggregated.
+    """
+    queues = {group[0]: iter(group) for group in members} if members is not None else {}
+    expanded = {}
+    for (entry_id, factory_id), amount in sorted(assignment.items()):
+        queue = queues.setdefault(entry_id, iter([entry_id]))
+        for _ in range(amount):
+            expanded[next(queue)] = factory_id
+    return expanded
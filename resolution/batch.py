@@ -0,0 +1,157 @@
+import argparse
+import contextlib
+import csv
+import glob
+import io
+import os
+import resource
+import sys
+from multiprocessing import Pool
+from time import perf_counter
+
+from instance_file import SUFFIX, load_instance
+from startup import RESULT_CACHE
+
+# Column layout of final_results.csv, as written by the old run_instances.sh
+COLUMNS = ["Instance", "NumFactories", "NumCountries", "NumChildren", "NumVariables", "NumRestrictions",
+           "ExecutionTime"]
+DETAIL_COLUMNS = ["Instance", "Result", "ExecutionTime", "PeakRSSKiB", "NumNonzeros"]
+
+_options = {}
+
+
+def _init_worker(options):
+    # Runs once per worker: the solver modules (and PuLP) are imported here, not per instance
+    from proj23 import preload
+
+    preload(options["engine"], options["solver"])
+    _options.update(options)
+
+
+def _reset_peak_rss():
+    # Linux lets a process reset its VmHWM so each instance gets its own peak
+    try:
+        with open("/proc/self/clear_refs", "w") as handle:
+            handle.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss_kib(reset):
+    if reset:
+        with open("/proc/self/status") as handle:
+            for line in handle:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    # Lifetime peak of the worker, an upper bound for this instance
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def solve_file(path):
+    """Solve one instance in this worker; returns the CSV and details rows for it.
+
+    An instance that fails is recorded with "error: ..." as its result instead of stopping
+    the batch.
+    """
+    from proj23 import solve_toy_distribution
+
+    reset = _reset_peak_rss()
+    output = io.StringIO()
+    stats = {}
+    start = perf_counter()
+    try:
+        if path.endswith(SUFFIX):
+            input_data = load_instance(path)
+        else:
+            with open(path, "rb") as handle:
+                input_data = handle.read()
+        with contextlib.redirect_stdout(output):
+            solve_toy_distribution(input_data, stats=stats, **_options)
+        result = output.getvalue().split("\n", 1)[0].strip()
+    except Exception as error:
+        result = stats["error"] = f"error: {type(error).__name__}: {error}"
+    elapsed = perf_counter() - start
+    peak = _peak_rss_kib(reset)
+
+    # Size of the model actually solved, after presolve and aggregation (0 when presolve,
+    # the precheck or the cache answered without one); a failed run leaves the counts empty
+    model = stats.get("model", {})
+    name = os.path.splitext(os.path.basename(path))[0]
+    row = [name, stats.get("factories", ""), stats.get("countries", ""), stats.get("children", ""),
+           model.get("variables", 0), model.get("constraints", 0), f"{elapsed:.6f}"]
+    stats.update(instance=name, peak_rss_kib=peak)
+    return row, [name, result, f"{elapsed:.6f}", peak, model.get("nonzeros", 0)], stats
+
+
+def collect_instances(patterns):
+    # Directories expand to their *.txt and binary files, the binary one winning when both
+    # exist; anything else is a glob
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            by_name = {}
+            candidates = glob.glob(os.path.join(pattern, "*.txt")) + glob.glob(os.path.join(pattern, "*" + SUFFIX))
+            for path in sorted(candidates):
+                name = os.path.splitext(path)[0]
+                if path.endswith(SUFFIX) or name not in by_name:
+                    by_name[name] = path
+            paths.extend(sorted(by_name.values()))
+        else:
+            paths.extend(sorted(glob.glob(pattern)))
+    return list(dict.fromkeys(paths))
+
+
+def run_batch(paths, jobs, options, output_csv, details_csv=None, metrics=None):
+    """Solve paths on jobs long-lived workers and write the results in input order.
+
+    With metrics, every instance's counters (see proj23.solve_instance) are also appended to
+    that file as JSON lines.
+    """
+    from proj23 import write_metrics
+
+    rows = {}
+    # Largest files first so a big instance does not start last and hold up the batch
+    order = sorted(paths, key=os.path.getsize, reverse=True)
+    with Pool(jobs or os.cpu_count(), initializer=_init_worker, initargs=(options,)) as pool:
+        for path, (row, details, stats) in zip(order, pool.imap(solve_file, order)):
+            rows[path] = row, details
+            if metrics:
+                write_metrics(stats, metrics)
+            print(f"{path}: {details[1]} in {row[-1]} s, peak RSS {details[3]} KiB", file=sys.stderr)
+
+    with open(output_csv, "w", newline="") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(COLUMNS)
+        writer.writerows(rows[path][0] for path in paths)
+    if details_csv:
+        with open(details_csv, "w", newline="") as handle:
+            writer = csv.writer(handle)
+            writer.writerow(DETAIL_COLUMNS)
+            writer.writerows(rows[path][1] for path in paths)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Solve a batch of instances on a pool of persistent workers")
+    parser.add_argument("instances", nargs="*", default=["inputs"], help="directories or globs (default: inputs)")
+    parser.add_argument("-j", "--jobs", type=int, default=0, help="worker processes (0: all cores)")
+    parser.add_argument("-o", "--output", default="final_results.csv", help="CSV in the run_instances.sh layout")
+    parser.add_argument("--details", default="final_results_details.csv",
+                        help="per-instance result, time, peak RSS and non-zeros ('' to skip)")
+    parser.add_argument("--metrics", help="append every instance's counters and phase times to this JSON lines file")
+    parser.add_argument("--engine", choices=["ilp", "flow", "greedy"], default="ilp")
+    parser.add_argument("--solver", choices=["glpk", "cbc", "highs", "portfolio"], default="glpk")
+    parser.add_argument("--relax", action="store_true")
+    parser.add_argument("--cache", nargs="?", const=RESULT_CACHE, metavar="PATH",
+                        help="reuse results of identical instances from an on-disk cache")
+    args = parser.parse_args()
+
+    paths = collect_instances(args.instances)
+    if not paths:
+        parser.error("no instances found")
+    # Workers are daemonic and cannot start their own component pools
+    options = {"engine": args.engine, "solver": args.solver, "relax": args.relax, "jobs": 1,
+               "cache": args.cache}
+    if args.metrics and os.path.exists(args.metrics):
+        os.remove(args.metrics)
+    run_batch(paths, args.jobs, options, args.output, args.details, args.metrics)
@@ -0,0 +1,234 @@
+import argparse
+import contextlib
+import glob
+import importlib
+import io
+import json
+import os
+import random
+import sys
+from time import perf_counter
+
+import numpy as np
+
+# Phases in pipeline order. write is PuLP writing the LP/MPS file inside model.solve(), which
+# is charged to the solver call otherwise. proj23 is timed by the phases it records itself
+# (see proj23.solve_instance): presolve also covers the precheck, aggregate the component
+# split, and build, solve and extract are summed over the components. The older solvers do
+# everything inline, so their phases come from the PuLP calls they make.
+PROJ23_PHASES = ["parse", "presolve", "aggregate", "build", "write", "solve", "extract"]
+LEGACY_PHASES = ["parse", "build", "write", "solve", "extract"]
+PERCENTILES = [10, 50, 90]
+
+
+class PhaseClock:
+    """Charges elapsed time to the current phase; switch() closes it and opens the next one."""
+
+    def __init__(self, phases):
+        self.times = dict.fromkeys(phases, 0.0)
+        self.current = None
+        self.mark = perf_counter()
+
+    def switch(self, phase):
+        now = perf_counter()
+        if self.current is not None:
+            self.times[self.current] += now - self.mark
+        previous, self.current, self.mark = self.current, phase, now
+        return previous
+
+
+@contextlib.contextmanager
+def pulp_probe(clock, legacy=False):
+    """Patch PuLP so file writing (and, for legacy solvers, every phase boundary) hits clock.
+
+    Legacy proj*.py solvers parse, build and extract inline, so the boundaries are taken from
+    the PuLP calls they make: parsing ends when the LpProblem is created, the solver call is
+    model.solve() and whatever follows it is extraction.
+    """
+    import pulp
+
+    problem = pulp.LpProblem
+    originals = {name: getattr(problem, name) for name in ("__init__", "solve", "writeLP", "writeMPS")}
+
+    def writer(name):
+        def write(*args, **kwargs):
+            previous = clock.switch("write")
+            try:
+                return originals[name](*args, **kwargs)
+            finally:
+                clock.switch(previous)
+        return write
+
+    def init(*args, **kwargs):
+        if clock.current == "parse":
+            clock.switch("build")
+        originals["__init__"](*args, **kwargs)
+
+    def solve(*args, **kwargs):
+        clock.switch("solve")
+        try:
+            return originals["solve"](*args, **kwargs)
+        finally:
+            clock.switch("extract")
+
+    patches = {"writeLP": writer("writeLP"), "writeMPS": writer("writeMPS")}
+    if legacy:
+        patches.update({"__init__": init, "solve": solve})
+    for name, patch in patches.items():
+        setattr(problem, name, patch)
+    try:
+        yield
+    finally:
+        for name in patches:
+            setattr(problem, name, originals[name])
+
+
+def run_proj23(data, options):
+    """One timed run of proj23.solve_toy_distribution(data, **options); returns (phase times, objective).
+
+    The LP/MPS write is taken out of solve. Only writes made in this process are seen, so for
+    components solved in the pool (jobs other than 1) it stays part of solve.
+    """
+    import proj23
+
+    clock = PhaseClock(PROJ23_PHASES)
+    stats = {}
+    with pulp_probe(clock), contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        proj23.solve_toy_distribution(data, stats=stats, **options)
+    times = {phase: stats["phases"].get(phase, 0.0) for phase in PROJ23_PHASES}
+    times["write"] = clock.times["write"]
+    times["solve"] -= times["write"]
+    return times, stats["result"]
+
+
+def legacy_text(data):
+    # The older solvers only read the "n m t" header, so add t when the file has "n m"
+    text = data.decode()
+    header, _, body = text.partition("\n")
+    values = header.split()
+    if len(values) == 2:
+        n, m = map(int, values)
+        children = sum(1 for line in body.splitlines() if line.strip()) - n - m
+        text = f"{n} {m} {children}\n{body}"
+    return text
+
+
+def run_legacy(module, text):
+    """One timed run of module.solve_toy_distribution(text); returns (phase times, objective)."""
+    clock = PhaseClock(LEGACY_PHASES)
+    output = io.StringIO()
+    with pulp_probe(clock, legacy=True), contextlib.redirect_stdout(output):
+        clock.switch("parse")
+        module.solve_toy_distribution(text)
+        clock.switch(None)
+    lines = output.getvalue().split()
+    return clock.times, int(lines[0]) if lines else None
+
+
+def ladder_instance(children, seed):
+    """Random instance with the value ranges of generate_inputs.py, as bytes with an n m t header."""
+    rng = random.Random(seed)
+    factories, countries = max(children // 10, 2), 10
+    lines = [f"{factories} {countries} {children}"]
+    lines += [f"{factory} {rng.randint(1, countries)} {rng.randint(10, 1000)}" for factory in range(1, factories + 1)]
+    lines += [f"{country} {rng.randint(100, 500)} {rng.randint(10, 100)}" for country in range(1, countries + 1)]
+    for child in range(1, children + 1):
+        requests = rng.sample(range(1, factories + 1), rng.randint(1, min(5, factories)))
+        lines.append(f"{child} {rng.randint(1, countries)} {' '.join(map(str, requests))}")
+    return ("\n".join(lines) + "\n").encode()
+
+
+def build_corpus(pattern, sample, ladder, seed):
+    """[(name, bytes)]: sample files from pattern spread over the size range, then the ladder."""
+    paths = sorted(glob.glob(pattern), key=os.path.getsize)
+    if sample and len(paths) > sample:
+        paths = [paths[round(i * (len(paths) - 1) / (sample - 1))] for i in range(sample)] if sample > 1 else paths[-1:]
+    corpus = []
+    for path in paths:
+        with open(path, "rb") as handle:
+            corpus.append((os.path.basename(path), handle.read()))
+    corpus += [(f"ladder_{children}", ladder_instance(children, seed)) for children in ladder]
+    return corpus
+
+
+def summarize(runs, phases):
+    # Percentiles per phase (and of the total) over the measured runs, in seconds
+    columns = {phase: [run[phase] for run in runs] for phase in phases}
+    columns["total"] = [sum(run.values()) for run in runs]
+    return {phase: dict(zip((f"p{q}" for q in PERCENTILES), np.percentile(values, PERCENTILES).tolist()))
+            for phase, values in columns.items()}
+
+
+def phases_of(module_name):
+    return PROJ23_PHASES if module_name == "proj23" else LEGACY_PHASES
+
+
+def benchmark(corpus, module_name, options, warmup, repeat):
+    """Time every corpus entry warmup + repeat times; only the repeats are kept.
+
+    options are the solve_toy_distribution keyword arguments for proj23 (engine, solver,
+    relax, warm_start, jobs); the older solvers take none.
+    """
+    if module_name == "proj23":
+        run = lambda data: run_proj23(data, options)  # noqa: E731
+    else:
+        module = importlib.import_module(module_name)
+        run = lambda data: run_legacy(module, legacy_text(data))  # noqa: E731
+
+    records = []
+    for name, data in corpus:
+        header = data.split(b"\n", 1)[0].split()
+        factories, countries = int(header[0]), int(header[1])
+        children = sum(1 for line in data.splitlines()[1:] if line.strip()) - factories - countries
+        runs, result = [], None
+        for index in range(warmup + repeat):
+            times, result = run(data)
+            if index >= warmup:
+                runs.append(times)
+        records.append({"instance": name, "factories": factories, "countries": countries, "children": children,
+                        "result": result, "runs": runs, "summary": summarize(runs, phases_of(module_name))})
+        print(f"{name}: result {result}, median total {records[-1]['summary']['total']['p50'] * 1000:.1f} ms",
+              file=sys.stderr)
+    return records
+
+
+def print_table(records, phases, file=sys.stdout):
+    # Median milliseconds per phase, with the p90 of the total for spread
+    columns = phases + ["total", "p90"]
+    print(f"{'instance':<24} {'children':>8} " + " ".join(f"{column:>9}" for column in columns), file=file)
+    for record in records:
+        summary = record["summary"]
+        values = [summary[phase]["p50"] for phase in phases] + [summary["total"]["p50"], summary["total"]["p90"]]
+        print(f"{record['instance']:<24} {record['children']:>8} " + " ".join(f"{value * 1000:9.1f}" for value in values),
+              file=file)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-phase timings (parse, presolve, build, write, solve, extract)")
+    parser.add_argument("--module", default="proj23", help="solver module to time: proj23 or any older proj*.py")
+    parser.add_argument("--engine", choices=["ilp", "flow", "greedy"], default="ilp", help="proj23 engine")
+    parser.add_argument("--solver", choices=["glpk", "cbc", "highs", "portfolio"], default="cbc", help="proj23 backend")
+    parser.add_argument("--relax", action="store_true", help="proj23 --relax")
+    parser.add_argument("--warm-start", action="store_true", help="proj23 --warm-start")
+    parser.add_argument("--jobs", type=int, default=0,
+                        help="proj23 processes for independent components (0: all cores, as proj23 runs)")
+    parser.add_argument("--inputs", default="inputs/input_instance_*.txt", help="glob of the fixed corpus")
+    parser.add_argument("--sample", type=int, default=10,
+                        help="files taken from --inputs, spread over the size range (0: all)")
+    parser.add_argument("--ladder", default="1000,10000,50000",
+                        help="children per generated instance, comma separated ('' for none)")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the generated instances")
+    parser.add_argument("--warmup", type=int, default=1, help="untimed runs per instance")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per instance")
+    parser.add_argument("--json", default="benchmark.json", help="where to write every run and summary")
+    args = parser.parse_args()
+
+    ladder = [int(size) for size in args.ladder.split(",") if size]
+    corpus = build_corpus(args.inputs, args.sample, ladder, args.seed)
+    options = {"engine": args.engine, "solver": args.solver, "relax": args.relax, "warm_start": args.warm_start,
+               "jobs": args.jobs}
+    records = benchmark(corpus, args.module, options, args.warmup, args.repeat)
+    with open(args.json, "w") as handle:
+        json.dump({"module": args.module, "options": options, "warmup": args.warmup, "repeat": args.repeat,
+                   "phases": phases_of(args.module), "instances": records}, handle, indent=1)
+    print_table(records, phases_of(args.module))
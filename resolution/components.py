@@ -0,0 +1,119 @@
+import os
+import sys
+
+import numpy as np
+
+from instance import edge_children, take
+
+
+def _find(parent, node):
+    # Union-find root with path halving
+    while parent[node] != node:
+        parent[node] = parent[parent[node]]
+        node = parent[node]
+    return node
+
+
+def _union(parent, a, b):
+    a, b = _find(parent, a), _find(parent, b)
+    if a != b:
+        parent[b] = a
+
+
+def _groups(labels, num_labels):
+    # Positions per label in ascending order, plus each position's rank inside its label
+    order = np.argsort(labels, kind="stable")
+    bounds = np.zeros(num_labels + 1, dtype=np.int64)
+    np.cumsum(np.bincount(labels, minlength=num_labels), out=bounds[1:])
+    rank = np.empty(len(labels), dtype=np.int32)
+    rank[order] = np.arange(len(labels)) - np.repeat(bounds[:-1], np.diff(bounds))
+    return order, bounds, rank
+
+
+def split_components(instance):
+    """Split an instance into independent sub-instances, one per connected component.
+
+    Nodes are factories, countries and children; a request links a child to a factory and
+    country membership links factories and children to their country. Export and delivery
+    rows only sum over edges inside one country's component, so each part can be solved on
+    its own and the objectives added. Returns the parts, largest first.
+    """
+    num_factories, num_countries = len(instance.factory_ids), len(instance.country_ids)
+    child_base = num_factories + num_countries
+    parent = list(range(child_base + len(instance.child_ids)))
+    for factory, country in enumerate(instance.factory_country.tolist()):
+        if country >= 0:
+            _union(parent, num_factories + country, factory)
+    for child, country in enumerate(instance.child_country.tolist()):
+        if country >= 0:
+            _union(parent, num_factories + country, child_base + child)
+    for child, factory in zip(edge_children(instance).tolist(), instance.request_factory.tolist()):
+        _union(parent, factory, child_base + child)
+
+    roots, labels = np.unique([_find(parent, node) for node in range(len(parent))], return_inverse=True)
+    if len(roots) <= 1:
+        return [instance] if len(parent) else []
+
+    # Every part keeps its nodes in their original order; ranks inside a part are the new positions
+    factory_order, factory_bounds, factory_rank = _groups(labels[:num_factories], len(roots))
+    country_order, country_bounds, country_rank = _groups(labels[num_factories:child_base], len(roots))
+    child_order, child_bounds, _ = _groups(labels[child_base:], len(roots))
+    parts = [take(instance, factory_order[factory_bounds[part]:factory_bounds[part + 1]],
+                  country_order[country_bounds[part]:country_bounds[part + 1]],
+                  child_order[child_bounds[part]:child_bounds[part + 1]],
+                  factory_map=factory_rank, country_map=country_rank)
+             for part in range(len(roots))]
+    return sorted(parts, key=lambda part: len(part.child_ids), reverse=True)
+
+
+def solve_components(parts, solve, jobs=1, bounds=None, phases=None):
+    """Solve every part with solve(instance) and merge the results.
+
+    solve returns (objective, assignment, phases) with objective -1 when the part is infeasible
+    and phases the part's time per phase; the merged objective is the sum, or -1 as soon as any
+    part is infeasible. Parts run in a process pool of jobs workers (all cores for 0) when there
+    is more than one. When bounds is a list, solve also returns an upper bound and each bound is
+    appended; when phases is a dict, the times of every part are added to it.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    total, assignment = 0, {}
+
+    def merge(result, part_assignment, part_phases, *bound):
+        nonlocal total
+        if phases is not None:
+            for name, seconds in part_phases.items():
+                phases[name] = phases.get(name, 0.0) + seconds
+        if result == -1:
+            return False
+        total += result
+        assignment.update(part_assignment)
+        if bounds is not None:
+            bounds.extend(bound)
+        return True
+
+    if jobs == 1 or len(parts) <= 1:
+        for part in parts:
+            if not merge(*solve(part)):
+                return -1, {}
+        return total, assignment
+
+    from multiprocessing import Pool
+
+    print(f"components: solving {len(parts)} parts on {min(jobs, len(parts))} processes", file=sys.stderr)
+    pool = Pool(min(jobs, len(parts)))
+    try:
+        for answer in pool.imap_unordered(solve, parts):
+            if not merge(*answer):
+                # One infeasible part makes the whole instance infeasible; stop the others
+                return -1, {}
+    finally:
+        pool.terminate()
+    return total, assignment
+
+if __name__ == "__main__":
+    from presolve import presolve
+    from proj23 import parse_input
+
+    reduced = presolve(parse_input(sys.stdin.buffer.read()))
+    parts = split_components(reduced.instance)
+    print(f"{len(parts)} components, children per component: {[len(part.child_ids) for part in parts]}")
@@ -0,0 +1,120 @@
+import sys
+from collections import namedtuple
+
+import numpy as np
+
+from instance import NO_LIMIT, edge_children
+
+# Constraint matrix in CSR form (indptr/indices/data) with row bounds, plus one column per
+# (child, factory) request edge. edge_child/edge_factory index child_ids/factory_ids. An
+# aggregated bucket of children is one "child" whose columns and row are bounded by its count.
+CsrModel = namedtuple("CsrModel", [
+    "indptr", "indices", "data", "row_lower", "row_upper",
+    "objective", "col_lower", "col_upper",
+    "edge_child", "edge_factory", "child_ids", "factory_ids", "country_ids",
+])
+
+
+def build_csr_model(instance):
+    """Assemble the toy distribution model as CSR arrays, without any per-term objects.
+
+    Rows are, in order: one "at most one toy" row per child, one stock row per factory, one
+    export row and one delivery row per country, minus the rows presolve marked as never binding
+    (stock or pmax NO_LIMIT, pmin 0). The objective maximises the sum of all columns.
+    """
+    n_children, n_factories, n_countries = (len(instance.child_ids), len(instance.factory_ids),
+                                            len(instance.country_ids))
+    factory_stock = np.where(instance.factory_stock == NO_LIMIT, np.inf, instance.factory_stock)
+    max_export = np.where(instance.country_pmax == NO_LIMIT, np.inf, instance.country_pmax)
+    min_delivery = instance.country_pmin.astype(np.float64)
+    multiplicity = instance.child_count.astype(np.float64)
+
+    # One column per request edge, already deduplicated in the instance
+    edge_child = edge_children(instance)
+    edge_factory = instance.request_factory
+    num_edges = len(edge_factory)
+    columns = np.arange(num_edges)
+
+    export_base = n_children + n_factories
+    delivery_base = export_base + n_countries
+
+    source_country = instance.factory_country[edge_factory]
+    target_country = instance.child_country[edge_child]
+    exported = (source_country != target_country) & (source_country >= 0)
+    delivered = target_country >= 0
+
+    rows = np.concatenate([edge_child, n_children + edge_factory,
+                           export_base + source_country[exported], delivery_base + target_country[delivered]])
+    cols = np.concatenate([columns, columns, columns[exported], columns[delivered]])
+
+    row_lower = np.concatenate([np.full(delivery_base, -np.inf), np.where(min_delivery > 0, min_delivery, -np.inf)])
+    row_upper = np.concatenate([multiplicity, factory_stock, max_export, np.full(n_countries, np.inf)])
+
+    # Drop rows left free, renumbering the rest
+    kept = np.isfinite(row_lower) | np.isfinite(row_upper)
+    new_row = np.cumsum(kept) - 1
+    entry_kept = kept[rows]
+    rows, cols = new_row[rows[entry_kept]], cols[entry_kept]
+    row_lower, row_upper = row_lower[kept], row_upper[kept]
+
+    # COO -> CSR with a stable sort on the row index
+    order = np.argsort(rows, kind="stable")
+    num_rows = len(row_lower)
+    indptr = np.zeros(num_rows + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=num_rows), out=indptr[1:])
+
+    return CsrModel(
+        indptr=indptr, indices=cols[order], data=np.ones(len(rows)),
+        row_lower=row_lower, row_upper=row_upper,
+        objective=np.ones(num_edges), col_lower=np.zeros(num_edges), col_upper=multiplicity[edge_child],
+        edge_child=edge_child, edge_factory=edge_factory,
+        child_ids=instance.child_ids, factory_ids=instance.factory_ids, country_ids=instance.country_ids,
+    )
+
+
+def model_size(instance):
+    """(variables, constraints, non-zeros) of build_csr_model(instance), counted without building it.
+
+    The PuLP model has the same columns and rows, so this is the size of either backend's model.
+    """
+    edge_factory = instance.request_factory
+    source_country = instance.factory_country[edge_factory]
+    target_country = instance.child_country[edge_children(instance)]
+    stock_rows = instance.factory_stock != NO_LIMIT
+    export_rows = instance.country_pmax != NO_LIMIT
+    delivery_rows = instance.country_pmin > 0
+    exported = (source_country != target_country) & (source_country >= 0)
+    delivered = target_country >= 0
+    constraints = len(instance.child_ids) + stock_rows.sum() + export_rows.sum() + delivery_rows.sum()
+    nonzeros = (len(edge_factory) + stock_rows[edge_factory].sum() + export_rows[source_country[exported]].sum()
+                + delivery_rows[target_country[delivered]].sum())
+    return len(edge_factory), int(constraints), int(nonzeros)
+
+
+def extract_objective(model, x):
+    """Number of satisfied children for a solution vector x over the model's columns."""
+    return int(np.rint(np.asarray(x) @ model.objective))
+
+
+def extract_assignment(model, x):
+    """Map (child id, factory id) -> toys for every edge used in the solution vector x."""
+    amounts = np.rint(np.asarray(x)).astype(np.int64)
+    chosen = amounts > 0
+    return dict(zip(zip(model.child_ids[model.edge_child[chosen]].tolist(),
+                        model.factory_ids[model.edge_factory[chosen]].tolist()),
+                    amounts[chosen].tolist()))
+
+
+def assignment_vector(model, assignment):
+    """Solution vector over the model's columns for a (child id, factory id) -> toys map."""
+    keys = zip(model.child_ids[model.edge_child].tolist(), model.factory_ids[model.edge_factory].tolist())
+    return np.array([assignment.get(key, 0) for key in keys], dtype=np.float64)
+
+
+if __name__ == "__main__":
+    from presolve import presolve
+    from proj23 import parse_input
+
+    reduced = presolve(parse_input(sys.stdin.buffer.read()))
+    model = build_csr_model(reduced.instance)
+    print(f"{len(model.row_lower)} rows, {len(model.objective)} columns, {len(model.indices)} non-zeros")
@@ -0,0 +1,80 @@
+import logging
+import sys
+
+import numpy as np
+
+from instance import NO_LIMIT, edge_children
+
+log = logging.getLogger("feasibility")
+
+
+def country_upper_bounds(instance):
+    """Cheap upper bound on the toys each country can receive, in a few vectorized passes.
+
+    A country gets at most one toy per live child, at most min(stock, demand) from each
+    factory its children request, and from each foreign country at most that country's
+    export cap. Stock and export caps shared between destinations are not split, which
+    keeps the bound valid and the pass linear. Returns one bound per country position.
+    """
+    num_countries = len(instance.country_ids)
+    live = np.bincount(instance.child_country[instance.child_country >= 0],
+                       weights=instance.child_count[instance.child_country >= 0], minlength=num_countries)
+
+    # Demand per (factory, destination country), capped by the factory's stock
+    children = edge_children(instance)
+    destination = instance.child_country[children]
+    listed = destination >= 0
+    pairs, pair = np.unique(instance.request_factory[listed].astype(np.int64) * num_countries
+                            + destination[listed], return_inverse=True)
+    demand = np.bincount(pair, weights=instance.child_count[children[listed]], minlength=len(pairs))
+    factory, destination = np.divmod(pairs, max(num_countries, 1))
+    stock = instance.factory_stock[factory]
+    amount = np.where(stock == NO_LIMIT, demand, np.minimum(stock, demand))
+
+    # Local supply adds up as is; imports from each foreign country are capped by its pmax
+    origin = instance.factory_country[factory]
+    local = origin == destination
+    bounds = np.bincount(destination[local], weights=amount[local], minlength=num_countries)
+    routes, route = np.unique(origin[~local].astype(np.int64) * num_countries + destination[~local],
+                              return_inverse=True)
+    imports = np.bincount(route, weights=amount[~local], minlength=len(routes))
+    route_origin, route_destination = np.divmod(routes, max(num_countries, 1))
+    cap = np.where(route_origin >= 0, instance.country_pmax[np.maximum(route_origin, 0)], NO_LIMIT)
+    imports = np.where(cap == NO_LIMIT, imports, np.minimum(cap, imports))
+    bounds = bounds + np.bincount(route_destination, weights=imports, minlength=num_countries)
+    return np.minimum(live, bounds).astype(np.int64)
+
+
+def precheck(instance):
+    """Return the id of a country whose pmin exceeds its upper bound (proving infeasibility), or None."""
+    bounds = country_upper_bounds(instance)
+    short = np.flatnonzero(instance.country_pmin > bounds)
+    if not len(short):
+        return None
+    country = short[0]
+    log.info("precheck: country %d needs %d toys but can receive at most %d",
+             instance.country_ids[country], instance.country_pmin[country], bounds[country])
+    return int(instance.country_ids[country])
+
+
+def check_feasibility(instance):
+    """Decide feasibility with a single circulation; True, False, or None when inconclusive.
+
+    Joint export caps are relaxed in the circulation, so a feasible circulation is only
+    conclusive when its flow happens to respect them.
+    """
+    from flow_engine import build_toy_network, circulation_feasible
+
+    network, source, sink, lower_bounds, joint_caps, _ = build_toy_network(instance, relax_exports=True)
+    if circulation_feasible(network, source, sink, lower_bounds) is None:
+        return False
+    for max_export, arcs_by_factory in joint_caps.values():
+        if sum(network.cap[arc ^ 1] for arcs in arcs_by_factory.values() for arc in arcs) > max_export:
+            return None
+    return True
+
+
+if __name__ == "__main__":
+    from proj23 import solve_toy_distribution
+
+    solve_toy_distribution(sys.stdin.buffer.read(), feasibility_only=True)
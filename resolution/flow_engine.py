@@ -0,0 +1,302 @@
+import sys
+from collections import deque
+
+from instance import NO_LIMIT
+
+INF = float("inf")
+
+
+class NonNetworkInstance(ValueError):
+    """Raised when an export cap cannot be expressed as a single arc of the flow network."""
+
+
+class FlowNetwork:
+    """Dinic max-flow on array-backed adjacency (edge i and its reverse are i and i ^ 1)."""
+
+    def __init__(self, num_nodes):
+        self.num_nodes = num_nodes
+        self.head = [-1] * num_nodes
+        self.nxt = []
+        self.to = []
+        self.cap = []
+
+    def add_node(self):
+        self.head.append(-1)
+        self.num_nodes += 1
+        return self.num_nodes - 1
+
+    def add_edge(self, u, v, cap):
+        edge = len(self.to)
+        self.to += (v, u)
+        self.cap += (cap, 0)
+        self.nxt += (self.head[u], self.head[v])
+        self.head[u] = edge
+        self.head[v] = edge + 1
+        return edge
+
+    def _bfs(self, source, sink):
+        level = [-1] * self.num_nodes
+        level[source] = 0
+        queue = deque([source])
+        head, nxt, to, cap = self.head, self.nxt, self.to, self.cap
+        while queue:
+            u = queue.popleft()
+            edge = head[u]
+            while edge != -1:
+                v = to[edge]
+                if cap[edge] > 0 and level[v] < 0:
+                    level[v] = level[u] + 1
+                    queue.append(v)
+                edge = nxt[edge]
+        return level if level[sink] >= 0 else None
+
+    def _augment(self, source, sink, level, current):
+        # Iterative DFS along the level graph; returns the bottleneck pushed (0 when blocked)
+        head, nxt, to, cap = self.head, self.nxt, self.to, self.cap
+        path = []
+        u = source
+        while True:
+            if u == sink:
+                pushed = min(cap[edge] for edge in path)
+                for edge in path:
+                    cap[edge] -= pushed
+                    cap[edge ^ 1] += pushed
+                return pushed
+            edge = current[u]
+            while edge != -1 and (cap[edge] <= 0 or level[to[edge]] != level[u] + 1):
+                edge = nxt[edge]
+            current[u] = edge
+            if edge != -1:
+                path.append(edge)
+                u = to[edge]
+                continue
+            # Dead end: prune u from the level graph and retreat one step
+            level[u] = -1
+            if not path:
+                return 0
+            edge = path.pop()
+            u = to[edge ^ 1]
+            current[u] = nxt[current[u]]
+
+    def max_flow(self, source, sink):
+        flow = 0
+        while True:
+            level = self._bfs(source, sink)
+            if level is None:
+                return flow
+            current = list(self.head)
+            while True:
+                pushed = self._augment(source, sink, level, current)
+                if not pushed:
+                    break
+                flow += pushed
+
+
+def build_toy_network(instance, relax_exports=False, export_split=None):
+    """Build the toy distribution flow network with lower bounds.
+
+    Arcs are source -> factory (stock), factory -> child and child -> country (1, or the
+    child's count for an aggregated bucket) and country -> sink (lower bound pmin). Export
+    caps become a factory -> export arc when the country has a single exporting factory, and
+    are dropped when they can never bind. Any other export cap raises NonNetworkInstance,
+    unless relax_exports is set, in which case it is dropped and the network only yields an
+    upper bound. export_split maps factory positions to individual export caps; a country
+    whose factories are all split is exact again, at the price of a fixed share of its cap
+    per factory.
+
+    Returns (network, source, sink, lower_bounds, joint_caps, request_arcs) where lower_bounds
+    is a list of (from_node, to_node, lower_bound), joint_caps maps every relaxed country
+    position to (max_export, {factory position: export arcs}), so a flow can be checked
+    against it afterwards, and request_arcs lists (child_id, factory_id, arc) to read an
+    assignment off the flow.
+    """
+    export_split = export_split or {}
+    network = FlowNetwork(2)
+    source, sink = 0, 1
+    factory_country = instance.factory_country.tolist()
+    factory_stock = instance.factory_stock.tolist()
+    child_country = instance.child_country.tolist()
+    child_count = instance.child_count.tolist()
+    request_ptr, request_factory = instance.request_ptr.tolist(), instance.request_factory.tolist()
+
+    factory_node = []
+    for stock in factory_stock:
+        factory_node.append(network.add_node())
+        network.add_edge(source, factory_node[-1], INF if stock == NO_LIMIT else stock)
+
+    # Foreign demand per exporting factory decides how each export cap is represented
+    foreign_demand = [0] * len(factory_stock)
+    for child, country in enumerate(child_country):
+        for factory in request_factory[request_ptr[child]:request_ptr[child + 1]]:
+            if factory_country[factory] != country:
+                foreign_demand[factory] += child_count[child]
+
+    exporters = {}
+    for factory, demand in enumerate(foreign_demand):
+        if demand and factory_country[factory] >= 0:
+            exporters.setdefault(factory_country[factory], []).append(factory)
+
+    export_node = {}
+    joint_caps = {}
+    for country, factories in exporters.items():
+        max_export = int(instance.country_pmax[country])
+        reachable = sum(foreign_demand[f] if factory_stock[f] == NO_LIMIT
+                        else min(factory_stock[f], foreign_demand[f]) for f in factories)
+        if max_export == NO_LIMIT or max_export >= reachable:
+            continue
+        if len(factories) == 1 or all(factory in export_split for factory in factories):
+            for factory in factories:
+                export_node[factory] = network.add_node()
+                network.add_edge(factory_node[factory], export_node[factory], export_split.get(factory, max_export))
+        elif relax_exports:
+            joint_caps[country] = (max_export, {factory: [] for factory in factories})
+        else:
+            raise NonNetworkInstance(
+                f"country {instance.country_ids[country]} caps exports of {len(factories)} factories jointly")
+
+    country_node = [network.add_node() for _ in range(len(instance.country_ids))]
+    lower_bounds = [(country_node[country], sink, pmin)
+                    for country, pmin in enumerate(instance.country_pmin.tolist())]
+
+    request_arcs = []
+    child_ids, factory_ids = instance.child_ids.tolist(), instance.factory_ids.tolist()
+    for child, country in enumerate(child_country):
+        child_node = network.add_node()
+        count = child_count[child]
+        for factory in request_factory[request_ptr[child]:request_ptr[child + 1]]:
+            source_country = factory_country[factory]
+            if source_country != country:
+                arc = network.add_edge(export_node.get(factory, factory_node[factory]), child_node, count)
+                if source_country in joint_caps:
+                    joint_caps[source_country][1][factory].append(arc)
+            else:
+                arc = network.add_edge(factory_node[factory], child_node, count)
+            request_arcs.append((child_ids[child], factory_ids[factory], arc))
+        network.add_edge(child_node, country_node[country] if country >= 0 else sink, count)
+
+    return network, source, sink, lower_bounds, joint_caps, request_arcs
+
+
+def circulation_feasible(network, source, sink, lower_bounds):
+    """Check whether a source -> sink flow meeting every lower bound exists.
+
+    Lower-bounded arcs get unbounded upper capacity. The check is a single circulation
+    through a super source/sink; on success the network holds that feasible flow and the
+    sink -> source return arc is returned, otherwise None.
+    """
+    excess = [0] * network.num_nodes
+    for u, v, lower in lower_bounds:
+        network.add_edge(u, v, INF)
+        excess[u] -= lower
+        excess[v] += lower
+
+    return_edge = network.add_edge(sink, source, INF)
+    super_source = network.add_node()
+    super_sink = network.add_node()
+    required = 0
+    for node, amount in enumerate(excess):
+        if amount > 0:
+            network.add_edge(super_source, node, amount)
+            required += amount
+        elif amount < 0:
+            network.add_edge(node, super_sink, -amount)
+
+    if network.max_flow(super_source, super_sink) < required:
+        return None
+    return return_edge
+
+
+def max_flow_with_lower_bounds(network, source, sink, lower_bounds):
+    """Maximum source -> sink flow subject to lower bounds, or -1 if no feasible flow exists.
+
+    After the circulation check the return arc is cut and the flow is maximised in the
+    remaining residual network.
+    """
+    return_edge = circulation_feasible(network, source, sink, lower_bounds)
+    if return_edge is None:
+        return -1
+
+    # Flow already routed through the return arc, then detach it and augment source -> sink
+    flow = network.cap[return_edge ^ 1]
+    network.cap[return_edge] = network.cap[return_edge ^ 1] = 0
+    return flow + network.max_flow(source, sink)
+
+
+def split_export_cap(max_export, exports):
+    """Share max_export between factories in proportion to the flow each one exported."""
+    total = sum(exports.values())
+    if not total:
+        first, *rest = exports
+        return {first: max_export, **{factory_id: 0 for factory_id in rest}}
+    split = {factory_id: amount * max_export // total for factory_id, amount in exports.items()}
+    leftover = max_export - sum(split.values())
+    by_remainder = sorted(exports, key=lambda factory_id: -(exports[factory_id] * max_export % total))
+    for factory_id in by_remainder[:leftover]:
+        split[factory_id] += 1
+    return split
+
+
+def read_assignment(network, request_arcs, assignment):
+    # Toys per (child, factory) request, taken from the flow on its arc
+    for child_id, factory_id, arc in request_arcs:
+        if network.cap[arc ^ 1]:
+            assignment[child_id, factory_id] = network.cap[arc ^ 1]
+
+
+def flow_bounds(instance, assignment=None):
+    """(lower, upper) bounds on the optimum of a presolved instance from at most two max-flows.
+
+    Export caps that are not arcs of the network are relaxed first, which gives upper (-1 when
+    the instance is infeasible). When that flow breaks a relaxed cap, each violated cap is split
+    between its factories in proportion to the relaxed flow; the split network is a restriction
+    of the problem, so its flow is a feasible solution and lower is its value (-1 when the
+    restriction is infeasible). assignment, when a dict, receives the toys per (child, factory)
+    of the lower solution. Raises NonNetworkInstance when some cap cannot be modelled at all.
+    """
+    network, source, sink, lower_bounds, joint_caps, request_arcs = build_toy_network(instance, relax_exports=True)
+    upper_bound = max_flow_with_lower_bounds(network, source, sink, lower_bounds)
+    if upper_bound == -1:
+        return -1, -1
+
+    exports = [(max_export, {factory: sum(network.cap[arc ^ 1] for arc in arcs)
+                             for factory, arcs in arcs_by_factory.items()})
+               for max_export, arcs_by_factory in joint_caps.values()]
+    if all(sum(shares.values()) <= max_export for max_export, shares in exports):
+        if assignment is not None:
+            read_assignment(network, request_arcs, assignment)
+        return upper_bound, upper_bound
+
+    export_split = {}
+    for max_export, shares in exports:
+        export_split.update(split_export_cap(max_export, shares))
+
+    network, source, sink, lower_bounds, _, request_arcs = build_toy_network(
+        instance, relax_exports=True, export_split=export_split)
+    result = max_flow_with_lower_bounds(network, source, sink, lower_bounds)
+    if assignment is not None and result != -1:
+        read_assignment(network, request_arcs, assignment)
+    return result, upper_bound
+
+
+def solve_flow(instance, assignment=None):
+    """Solve a presolved instance exactly with max-flow.
+
+    The relaxation of flow_bounds() is exact when it is infeasible or when its flow respects
+    every relaxed cap, and reaching its upper bound with the split caps proves optimality.
+    When neither holds, NonNetworkInstance is raised and the caller needs the ILP. When
+    assignment is a dict it receives the toys per (child, factory).
+    """
+    solution = {}
+    lower_bound, upper_bound = flow_bounds(instance, solution)
+    if lower_bound != upper_bound:
+        raise NonNetworkInstance(
+            f"split export caps reach {lower_bound} below the relaxed bound of {upper_bound}")
+    if assignment is not None:
+        assignment.update(solution)
+    return upper_bound
+
+
+if __name__ == "__main__":
+    from proj23 import solve_toy_distribution
+
+    solve_toy_distribution(sys.stdin.buffer.read(), engine="flow")
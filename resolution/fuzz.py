@@ -0,0 +1,316 @@
+import argparse
+import contextlib
+import io
+import os
+import random
+import shutil
+import sys
+from multiprocessing import Pool
+from time import perf_counter
+
+# Engine configurations compared on every case, as solve_instance() keyword arguments. The
+# feasibility check only says whether a solution exists, so it is compared on that alone; the
+# greedy engine may stop short of the optimum, so it is only checked for a valid assignment
+# that no exact engine beats. Runs with a time_limit must also report a bound no exact engine
+# beats.
+ENGINES = {
+    "highs": {"solver": "highs"},
+    "highs-relax": {"solver": "highs", "relax": True},
+    "no-aggregate": {"solver": "highs", "aggregate": False},
+    "flow": {"engine": "flow", "solver": "highs"},
+    "greedy": {"engine": "greedy", "solver": "highs"},
+    "warm-start": {"solver": "cbc", "warm_start": True},
+    "highs-warm-start": {"solver": "highs", "warm_start": True},
+    "feasibility": {"solver": "highs", "feasibility_only": True},
+    "cbc": {"solver": "cbc"},
+    "glpk": {"solver": "glpk"},
+    "portfolio": {"solver": "portfolio"},
+    "anytime": {"solver": "highs", "time_limit": 60},
+    "anytime-greedy": {"engine": "greedy", "solver": "highs", "time_limit": 60},
+}
+APPROXIMATE = {"greedy", "anytime-greedy"}
+DEFAULT_ENGINES = ("reference,default,highs,highs-relax,no-aggregate,flow,greedy,feasibility,cbc,glpk,anytime,"
+                   "anytime-greedy,warm-start,highs-warm-start")
+
+
+def reference_objective(text):
+    """Optimum of text (-1 when infeasible) from the plain PuLP model solved by CBC.
+
+    The model is built straight from the text, one binary per distinct known request, with
+    none of the presolve, precheck, aggregation and component split that every ENGINES entry
+    shares, so a bug in those shows up as a disagreement with this reference.
+    """
+    import pulp
+
+    rows = [list(map(int, line.split())) for line in text.split("\n") if line.strip()]
+    n, m, t = rows[0]
+    factories = {factory_id: (country_id, stock) for factory_id, country_id, stock in rows[1:n + 1]}
+    countries = {country_id: (pmax, pmin) for country_id, pmax, pmin in rows[n + 1:n + 1 + m]}
+    children = [(row[1], dict.fromkeys(row[2:])) for row in rows[n + 1 + m:n + 1 + m + t]]
+
+    model = pulp.LpProblem("reference", pulp.LpMaximize)
+    x = {(child, factory_id): pulp.LpVariable(f"x_{child}_{factory_id}", cat="Binary")
+         for child, (_, requests) in enumerate(children) for factory_id in requests if factory_id in factories}
+    model += pulp.lpSum(x.values())
+    for child in range(len(children)):
+        model += pulp.lpSum(var for (owner, _), var in x.items() if owner == child) <= 1
+    for factory_id, (_, stock) in factories.items():
+        model += pulp.lpSum(var for (_, requested), var in x.items() if requested == factory_id) <= stock
+    for country_id, (pmax, pmin) in countries.items():
+        model += pulp.lpSum(var for (child, factory_id), var in x.items()
+                            if factories[factory_id][0] == country_id != children[child][0]) <= pmax
+        model += pulp.lpSum(var for (child, _), var in x.items() if children[child][0] == country_id) >= pmin
+    model.solve(pulp.PULP_CBC_CMD(msg=0))
+    return int(round(pulp.value(model.objective) or 0)) if model.status == 1 else -1
+
+
+def default_objective(text):
+    """What proj23 prints for text when run with no options."""
+    from proj23 import solve_toy_distribution
+
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        solve_toy_distribution(text.encode())
+    return int(output.getvalue().split()[0])
+
+
+# Configurations that do not go through solve_instance: text -> objective, without an assignment
+RUNNERS = {"reference": reference_objective, "default": default_objective}
+
+
+def _not_installed(error):
+    # PuLP's error for a solver binary that is missing here (glpsol where GLPK is not installed);
+    # the configuration still ran everything up to the solver call
+    return str(error).startswith("PuLP: cannot execute")
+
+
+def random_case(rng):
+    """Small instance text: half from test_generator, half with zero stocks, zero caps, no or unlisted
+    countries and unknown factories that the generator never produces."""
+    if rng.random() < 0.5:
+        from test_generator import generate_test_case
+
+        factories = rng.randint(2, 12)
+        return generate_test_case(factories, rng.randint(1, 4), rng.randint(0, 30), rng.uniform(0.1, 1.0),
+                                  rng.randint(2, 8), rng.randint(1, factories), rng.getrandbits(32)).decode()
+    factories, countries, children = rng.randint(1, 8), rng.randint(0, 4), rng.randint(0, 16)
+    lines = [f"{factories} {countries} {children}"]
+    lines += [f"{factory} {rng.randint(1, countries + 1)} {rng.randint(0, 4)}" for factory in range(1, factories + 1)]
+    lines += [f"{country} {rng.randint(0, 5)} {rng.choice([0, 0, 1, 2, 3, 5])}" for country in range(1, countries + 1)]
+    for child in range(1, children + 1):
+        requests = rng.sample(range(1, factories + 2), rng.randint(1, min(3, factories)))
+        lines.append(f"{child} {rng.randint(1, countries + 1)} " + " ".join(map(str, requests)))
+    return "\n".join(lines) + "\n"
+
+
+def check_assignment(instance, objective, served):
+    """Why served (child id -> factory id) is not a solution worth objective, or None if it is."""
+    if len(served) != objective:
+        return f"{len(served)} children served for objective {objective}"
+    factory = {factory_id: position for position, factory_id in enumerate(instance.factory_ids.tolist())}
+    child = {child_id: position for position, child_id in enumerate(instance.child_ids.tolist())}
+    used, exported, delivered = {}, {}, {}
+    for child_id, factory_id in served.items():
+        if child_id not in child or factory_id not in factory:
+            return f"unknown pair {child_id} {factory_id}"
+        position = child[child_id]
+        requests = instance.request_factory[instance.request_ptr[position]:instance.request_ptr[position + 1]]
+        if factory[factory_id] not in requests.tolist():
+            return f"child {child_id} did not ask factory {factory_id}"
+        used[factory_id] = used.get(factory_id, 0) + 1
+        source, target = int(instance.factory_country[factory[factory_id]]), int(instance.child_country[position])
+        if source >= 0 and source != target:
+            exported[source] = exported.get(source, 0) + 1
+        if target >= 0:
+            delivered[target] = delivered.get(target, 0) + 1
+    for factory_id, count in used.items():
+        if count > instance.factory_stock[factory[factory_id]]:
+            return f"factory {factory_id} over its stock"
+    for country, (pmax, pmin) in enumerate(zip(instance.country_pmax.tolist(), instance.country_pmin.tolist())):
+        if exported.get(country, 0) > pmax:
+            return f"country {instance.country_ids[country]} over its export cap"
+        if delivered.get(country, 0) < pmin:
+            return f"country {instance.country_ids[country]} under its minimum"
+    return None
+
+
+def find_failure(text, engines):
+    """Description of how the engines disagree (or fail) on text, or None when they agree.
+
+    The part before the first colon names the kind of failure, which shrink() keeps fixed.
+    """
+    from proj23 import parse_input, solve_instance
+
+    instance = parse_input(text)
+    objectives, bounds = {}, {}
+    for name in engines:
+        options = ENGINES.get(name, {})
+        stats = {}
+        try:
+            with contextlib.redirect_stderr(io.StringIO()):
+                if name in RUNNERS:
+                    objective, served = RUNNERS[name](text), None
+                else:
+                    objective, served = solve_instance(instance, show_assignment=True, stats=stats, **options)
+        except Exception as error:
+            if _not_installed(error):
+                continue
+            return f"{name} raised {type(error).__name__}: {error}"
+        if options.get("feasibility_only"):
+            objectives[name] = "feasible" if objective != -1 else -1
+            continue
+        objectives[name] = objective
+        if stats.get("bound") is not None:
+            bounds[name] = stats["bound"]
+        if objective != -1 and served is not None:
+            problem = check_assignment(instance, objective, served)
+            if problem:
+                return f"{name} gave an invalid assignment: {problem}"
+
+    exact = {value for name, value in objectives.items() if value != "feasible" and name not in APPROXIMATE}
+    feasible = {value != -1 for value in objectives.values()}
+    optimum = max(exact, default=-1)
+    above_optimum = [name for name in APPROXIMATE if optimum != -1 and objectives.get(name, -1) > optimum]
+    if len(exact) > 1 or len(feasible) > 1 or above_optimum:
+        return "objectives differ: " + ", ".join(f"{name}={value}" for name, value in objectives.items())
+    below_optimum = [f"{name}={bound}" for name, bound in bounds.items() if bound < optimum]
+    if below_optimum:
+        return f"bound under the optimum {optimum}: " + ", ".join(below_optimum)
+    return None
+
+
+def _parse_case(text):
+    # [factories, countries, children] as lists of int rows; requests stay on the child rows
+    lines = [list(map(int, line.split())) for line in text.strip().split("\n")]
+    n, m = lines[0][:2]
+    return [lines[1:n + 1], lines[n + 1:n + 1 + m], lines[n + 1 + m:]]
+
+
+def _format_case(case):
+    factories, countries, children = case
+    lines = [[len(factories), len(countries), len(children)]] + factories + countries + children
+    return "\n".join(" ".join(map(str, line)) for line in lines) + "\n"
+
+
+def _candidates(case):
+    # Smaller versions of case, biggest cuts first
+    factories, countries, children = case
+    size = len(children)
+    while size >= 1:
+        for start in range(0, len(children), size):
+            yield [factories, countries, children[:start] + children[start + size:]]
+        size //= 2
+    for index, (factory_id, _, _) in enumerate(factories):
+        yield [factories[:index] + factories[index + 1:], countries,
+               [child[:2] + [f for f in child[2:] if f != factory_id] for child in children]]
+    for index in range(len(countries)):
+        yield [factories, countries[:index] + countries[index + 1:], children]
+    for index, child in enumerate(children):
+        for position in range(2, len(child)):
+            yield [factories, countries, children[:index] + [child[:position] + child[position + 1:]] + children[index + 1:]]
+    # Numbers down towards 0: stocks, export caps and minimum deliveries
+    for table, column in ((0, 2), (1, 1), (1, 2)):
+        for index, row in enumerate(case[table]):
+            for value in {0, row[column] // 2, row[column] - 1}:
+                if 0 <= value < row[column]:
+                    smaller = list(case)
+                    smaller[table] = case[table][:index] + [row[:column] + [value] + row[column + 1:]] + case[table][index + 1:]
+                    yield smaller
+
+
+def shrink(text, engines, reason, budget=2000):
+    """Greedy delta debugging: keep applying the first reduction that still fails the same way."""
+    kind = reason.partition(":")[0]
+    case = _parse_case(text)
+    tries = 0
+    progress = True
+    while progress and tries < budget:
+        progress = False
+        for candidate in _candidates(case):
+            tries += 1
+            if (find_failure(_format_case(candidate), engines) or "").partition(":")[0] == kind:
+                case, progress = candidate, True
+                break
+            if tries >= budget:
+                break
+    return _format_case(case)
+
+
+_engines = []
+
+
+def _init_worker(engines):
+    from proj23 import preload
+
+    _engines.extend(engines)
+    preload("flow", "highs")
+
+
+def run_batch(seeds):
+    """Fuzz the cases of seeds in this worker; returns (cases run, [(seed, reason, reproducer)])."""
+    failures = []
+    for seed in seeds:
+        text = random_case(random.Random(seed))
+        reason = find_failure(text, _engines)
+        if reason:
+            failures.append((seed, reason, shrink(text, _engines, reason)))
+    return len(seeds), failures
+
+
+def fuzz(engines, jobs=0, cases=0, seconds=0, seed=0, batch=50, output_dir="fuzz_failures", keep_going=False):
+    """Run cases (0: until stopped) on jobs workers; shrunk reproducers go to output_dir."""
+    started = perf_counter()
+    done = found = 0
+
+    def batches():
+        start = seed
+        while not cases or start < seed + cases:
+            yield range(start, start + batch if not cases else min(start + batch, seed + cases))
+            start += batch
+
+    with Pool(jobs or os.cpu_count(), initializer=_init_worker, initargs=(engines,)) as pool:
+        for count, failures in pool.imap_unordered(run_batch, batches()):
+            done += count
+            for case_seed, reason, reproducer in failures:
+                found += 1
+                os.makedirs(output_dir, exist_ok=True)
+                path = os.path.join(output_dir, f"case_{case_seed}.txt")
+                with open(path, "w") as handle:
+                    handle.write(reproducer)
+                print(f"seed {case_seed}: {reason}\n  reproducer ({reproducer.count(chr(10))} lines): {path}",
+                      file=sys.stderr)
+            elapsed = perf_counter() - started
+            print(f"{done} cases, {found} failures, {done / elapsed * 60:.0f} cases/min", file=sys.stderr)
+            if (found and not keep_going) or (seconds and elapsed >= seconds):
+                break
+    return found
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Differential fuzzing of the solver engines on random small instances")
+    parser.add_argument("--engines", default=DEFAULT_ENGINES,
+                        help=f"comma separated, from {', '.join([*RUNNERS, *ENGINES])} (default: {DEFAULT_ENGINES})")
+    parser.add_argument("-j", "--jobs", type=int, default=0, help="worker processes (0: all cores)")
+    parser.add_argument("--cases", type=int, default=0, help="cases to run (0: until a failure or --seconds)")
+    parser.add_argument("--seconds", type=float, default=0, help="stop after this long (0: no limit)")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first case; case i uses seed + i")
+    parser.add_argument("-o", "--output-dir", default="fuzz_failures", help="where shrunk reproducers are written")
+    parser.add_argument("--keep-going", action="store_true", help="do not stop at the first failure")
+    parser.add_argument("--replay", metavar="FILE", help="check a single instance file and exit")
+    args = parser.parse_args()
+
+    engines = [name for name in args.engines.split(",") if name]
+    unknown = [name for name in engines if name not in ENGINES and name not in RUNNERS]
+    if unknown:
+        parser.error(f"unknown engines: {', '.join(unknown)}")
+    if not shutil.which("glpsol"):
+        print("glpsol not found: the glpk and default configurations only run up to the solver call",
+              file=sys.stderr)
+
+    if args.replay:
+        with open(args.replay) as handle:
+            reason = find_failure(handle.read(), engines)
+        print(reason or "engines agree")
+        sys.exit(1 if reason else 0)
+    sys.exit(1 if fuzz(engines, args.jobs, args.cases, args.seconds, args.seed, output_dir=args.output_dir,
+                       keep_going=args.keep_going) else 0)
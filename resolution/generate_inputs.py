@@ -1,70 +1,101 @@
+import argparse
 import csv
-import random
+import hashlib
+import json
+import os
+from multiprocessing import Pool
+
+import numpy as np
+
+from test_generator import TOKENS_PER_CHUNK, encode_rows, sample_requests
 
-def create_input_files(csv_file, output_dir):
+MANIFEST = "manifest.json"
+
+def row_seeds(seed, count):
+    """
+    Semente de cada linha do CSV, derivada da semente base (a mesma linha gera sempre a mesma instância)
     """
-    Lê os dados do arquivo CSV e cria arquivos de entrada para o proj23.py
+    return [int(child.generate_state(1)[0]) for child in np.random.SeedSequence(seed).spawn(count)]
+
+def write_instance(path, num_factories, num_countries, num_children, seed):
+    """
+    Cria um arquivo de entrada (cabeçalho "n m t") em blocos grandes e devolve (pedidos, bytes, sha256)
+    """
+    rng = np.random.default_rng(seed)
+    digest = hashlib.sha256()
+    size = requests_total = 0
+
+    with open(path, 'wb', buffering=1 << 20) as out:
+        def emit(chunk):
+            nonlocal size
+            digest.update(chunk)
+            out.write(chunk)
+            size += len(chunk)
+
+        emit(f"{num_factories} {num_countries} {num_children}\n".encode())
+
+        # Fábricas: país aleatório e capacidade de produção entre 10 e 1000
+        factory_ids = np.arange(1, num_factories + 1)
+        emit(encode_rows(np.column_stack([factory_ids, rng.integers(1, num_countries + 1, num_factories),
+                                          rng.integers(10, 1001, num_factories)]), np.full(num_factories, 3)))
+
+        # Países: exportação máxima entre 100 e 500, entrega mínima entre 10 e 100
+        country_ids = np.arange(1, num_countries + 1)
+        emit(encode_rows(np.column_stack([country_ids, rng.integers(100, 501, num_countries),
+                                          rng.integers(10, 101, num_countries)]), np.full(num_countries, 3)))
+
+        # Crianças: país aleatório e de 1 a 5 fábricas distintas pedidas, em blocos
+        max_requests = min(5, num_factories)
+        chunk = TOKENS_PER_CHUNK // (max_requests + 2)
+        for start in range(0, num_children, chunk):
+            child_ids = np.arange(start + 1, min(start + chunk, num_children) + 1)
+            countries = rng.integers(1, num_countries + 1, len(child_ids))
+            counts = rng.integers(1, max_requests + 1, len(child_ids))
+            requests = sample_requests(rng, counts, num_factories)
+            emit(encode_rows(np.column_stack([child_ids, countries, requests]), counts + 2))
+            requests_total += int(counts.sum())
+
+    return requests_total, size, digest.hexdigest()
+
+def _create(job):
+    index, row, seed, output_dir = job
+    num_factories = int(row['num_factories'])
+    num_countries = int(row['num_countries'])
+    num_children = int(row['num_children'])
+    output_file = os.path.join(output_dir, f"input_instance_{index + 1}.txt")
+    requests, size, sha256 = write_instance(output_file, num_factories, num_countries, num_children, seed)
+    return {'file': os.path.basename(output_file), 'seed': seed, 'num_factories': num_factories,
+            'num_countries': num_countries, 'num_children': num_children, 'num_requests': requests,
+            'bytes': size, 'sha256': sha256}
+
+def create_input_files(csv_file, output_dir, seed=0, jobs=0):
+    """
+    Lê os dados do arquivo CSV e cria arquivos de entrada para o proj23.py, uma linha por processo,
+    e escreve o manifesto (sementes, tamanhos e hashes) em output_dir
     """
     with open(csv_file, 'r') as file:
-        reader = csv.DictReader(file)
-        
-        # Iterar sobre cada linha do CSV e criar um arquivo de entrada
-        for i, row in enumerate(reader):
-            num_factories = int(row['num_factories'])
-            num_countries = int(row['num_countries'])
-            num_children = int(row['num_children'])
-
-            # Criação dos dados no formato esperado
-            factories = []
-            countries = []
-            children = []
-
-            # Gerar dados das fábricas
-            for factory_id in range(1, num_factories + 1):
-                country_id = random.randint(1, num_countries)  # Associar fábrica a um país aleatório
-                stock = random.randint(10, 1000)  # Capacidade de produção aleatória
-                factories.append((factory_id, country_id, stock))
-
-            # Gerar dados dos países
-            for country_id in range(1, num_countries + 1):
-                max_export = random.randint(100, 500)  # Exportação máxima
-                min_delivery = random.randint(10, 100)  # Entrega mínima
-                countries.append((country_id, max_export, min_delivery))
-
-            # Gerar dados das crianças
-            for child_id in range(1, num_children + 1):
-                country_id = random.randint(1, num_countries)  # País da criança
-                num_requests = random.randint(1, min(5, num_factories))  # Número de fábricas pedidas
-                requests = random.sample(range(1, num_factories + 1), num_requests)  # Fábricas aleatórias
-                children.append((child_id, country_id, requests))
-
-            # Criar o arquivo de entrada
-            output_file = f"{output_dir}/input_instance_{i+1}.txt"
-            with open(output_file, 'w') as out:
-                # Linha 1: Número de fábricas e países
-                out.write(f"{num_factories} {num_countries}\n")
-                
-                # Linhas das fábricas
-                for factory in factories:
-                    out.write(f"{factory[0]} {factory[1]} {factory[2]}\n")
-
-                # Linhas dos países
-                for country in countries:
-                    out.write(f"{country[0]} {country[1]} {country[2]}\n")
-
-                # Linhas das crianças
-                for child in children:
-                    out.write(f"{child[0]} {child[1]} {' '.join(map(str, child[2]))}\n")
-
-            print(f"Arquivo criado: {output_file}")
-
-# Use o script com os seguintes parâmetros
-csv_file = "experiment_results.csv"  # Nome do arquivo gerado pelo p3_gerador.py
-output_dir = "./inputs"  # Diretório para salvar os arquivos de entrada
-
-# Criar o diretório, se necessário
-import os
-os.makedirs(output_dir, exist_ok=True)
+        rows = list(csv.DictReader(file))
+
+    jobs_list = [(index, row, row_seed, output_dir) for index, (row, row_seed)
+                 in enumerate(zip(rows, row_seeds(seed, len(rows))))]
+    with Pool(jobs or os.cpu_count()) as pool:
+        instances = []
+        for entry in pool.imap(_create, jobs_list):
+            instances.append(entry)
+            print(f"Arquivo criado: {os.path.join(output_dir, entry['file'])}")
+
+    with open(os.path.join(output_dir, MANIFEST), 'w') as out:
+        json.dump({'source': os.path.basename(csv_file), 'seed': seed, 'instances': instances}, out, indent=1)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera as instâncias de entrada a partir do CSV do p3_gerador.py")
+    # Nome do arquivo gerado pelo p3_gerador.py e diretório para salvar os arquivos de entrada
+    parser.add_argument("csv_file", nargs="?", default="experiment_results.csv")
+    parser.add_argument("-o", "--output-dir", default="./inputs")
+    parser.add_argument("--seed", type=int, default=0, help="semente base; cada linha recebe a sua própria")
+    parser.add_argument("-j", "--jobs", type=int, default=0, help="processos (0: todos os núcleos)")
+    args = parser.parse_args()
 
-# Executar a função
-create_input_files(csv_file, output_dir)
+    # Criar o diretório, se necessário
+    os.makedirs(args.output_dir, exist_ok=True)
+    create_input_files(args.csv_file, args.output_dir, args.seed, args.jobs)
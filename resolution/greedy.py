@@ -0,0 +1,92 @@
+import sys
+
+import numpy as np
+
+from instance import NO_LIMIT, edge_children
+
+
+def greedy_assignment(instance):
+    """Assign toys greedily, for quick approximate answers and MIP warm starts.
+
+    Countries that still need deliveries to reach pmin are served first, the most demanding
+    first, then every other child. Within each pass children with the fewest live factories
+    (stock left and, for imports, export cap left) go first; each takes domestic factories
+    before imports, fuller factories first. A bucket of an aggregated instance takes up to its
+    count. Stock and export caps always hold. Returns (objective, assignment, feasible), with
+    assignment mapping (child id, factory id) -> toys and feasible telling whether every pmin
+    was met.
+    """
+    num_children = len(instance.child_ids)
+    unlimited = int(instance.child_count.sum()) + 1
+    stock = np.where(instance.factory_stock == NO_LIMIT, unlimited, instance.factory_stock).astype(np.int64)
+    export_left = np.where(instance.country_pmax == NO_LIMIT, unlimited, instance.country_pmax).astype(np.int64)
+    need = instance.country_pmin.astype(np.int64)
+    left = instance.child_count.astype(np.int64)
+
+    edge_child = edge_children(instance)
+    factory = instance.request_factory
+    source = instance.factory_country[factory]
+    imported = (source >= 0) & (source != instance.child_country[edge_child])
+
+    def by_live_factories(children):
+        # children sorted by how many of their factories can still deliver to them; imports
+        # only come from listed countries, so the appended cap is never read
+        live = (stock[factory] > 0) & (~imported | (np.append(export_left, 0)[source] > 0))
+        degree = np.bincount(edge_child, weights=live, minlength=num_children)
+        return children[np.argsort(degree[children], kind="stable")].tolist()
+
+    # The inner loop runs on Python lists; the arrays are rebuilt from them between passes
+    ptr, factory_list, source_list = instance.request_ptr.tolist(), factory.tolist(), source.tolist()
+    imported_list, child_country = imported.tolist(), instance.child_country.tolist()
+    child_ids, factory_ids = instance.child_ids.tolist(), instance.factory_ids.tolist()
+    stock_list, export_list, need_list, left_list = stock.tolist(), export_left.tolist(), need.tolist(), left.tolist()
+    assignment = {}
+
+    def serve(child, limit):
+        served = 0
+        options = sorted(range(ptr[child], ptr[child + 1]),
+                         key=lambda edge: (imported_list[edge], -stock_list[factory_list[edge]]))
+        for edge in options:
+            position = factory_list[edge]
+            amount = min(limit - served, stock_list[position])
+            if imported_list[edge]:
+                amount = min(amount, export_list[source_list[edge]])
+            if amount <= 0:
+                continue
+            stock_list[position] -= amount
+            if imported_list[edge]:
+                export_list[source_list[edge]] -= amount
+            key = (child_ids[child], factory_ids[position])
+            assignment[key] = assignment.get(key, 0) + amount
+            served += amount
+            if served == limit:
+                break
+        left_list[child] -= served
+        if child_country[child] >= 0:
+            need_list[child_country[child]] -= served
+
+    # First pass: children of countries below their minimum, up to what the country lacks
+    # (the appended 0 is what unlisted countries, at -1, need)
+    needy = np.flatnonzero(np.append(need, 0)[instance.child_country] > 0)
+    waiting = {}
+    for child in by_live_factories(needy):
+        waiting.setdefault(child_country[child], []).append(child)
+    for country in sorted(waiting, key=lambda country: -need_list[country]):
+        for child in waiting[country]:
+            if need_list[country] <= 0:
+                break
+            serve(child, min(left_list[child], need_list[country]))
+
+    # Second pass: everyone with room left, against the stock and caps that remain
+    stock, export_left, left = np.array(stock_list), np.array(export_list), np.array(left_list)
+    for child in by_live_factories(np.flatnonzero(left > 0)):
+        serve(child, left_list[child])
+
+    objective = int(instance.child_count.sum()) - sum(left_list)
+    return objective, assignment, all(missing <= 0 for missing in need_list)
+
+
+if __name__ == "__main__":
+    from proj23 import solve_toy_distribution
+
+    solve_toy_distribution(sys.stdin.buffer.read(), engine="greedy")
@@ -0,0 +1,224 @@
+import math
+import sys
+import time
+from time import perf_counter
+
+import numpy as np
+
+from csr_model import assignment_vector, build_csr_model, extract_assignment, extract_objective
+
+try:
+    import highspy
+except ImportError:  # scipy ships the same HiGHS solver behind scipy.optimize.milp
+    highspy = None
+
+
+def _highspy_solver(model, integral):
+    # A quiet Highs object holding the model, ready to run
+    lp = highspy.HighsLp()
+    lp.num_col_ = len(model.objective)
+    lp.num_row_ = len(model.row_lower)
+    lp.sense_ = highspy.ObjSense.kMaximize
+    lp.col_cost_ = model.objective
+    lp.col_lower_ = model.col_lower
+    lp.col_upper_ = model.col_upper
+    lp.row_lower_ = np.maximum(model.row_lower, -highspy.kHighsInf)
+    lp.row_upper_ = np.minimum(model.row_upper, highspy.kHighsInf)
+    lp.a_matrix_.format_ = highspy.MatrixFormat.kRowwise
+    lp.a_matrix_.num_col_ = lp.num_col_
+    lp.a_matrix_.num_row_ = lp.num_row_
+    lp.a_matrix_.start_ = model.indptr
+    lp.a_matrix_.index_ = model.indices
+    lp.a_matrix_.value_ = model.data
+    if integral:
+        lp.integrality_ = [highspy.HighsVarType.kInteger] * lp.num_col_
+
+    solver = highspy.Highs()
+    solver.setOptionValue("output_flag", False)
+    if not integral:
+        # Simplex ends on a vertex, which is what the integrality check of --relax relies on
+        solver.setOptionValue("solver", "simplex")
+    solver.passModel(lp)
+    return solver
+
+
+def _solve_highspy(model, integral, start=None):
+    solver = _highspy_solver(model, integral)
+    if start is not None:
+        solution = highspy.HighsSolution()
+        solution.col_value = start
+        solver.setSolution(solution)
+    solver.run()
+    if solver.getModelStatus() != highspy.HighsModelStatus.kOptimal:
+        return None
+    return np.asarray(solver.getSolution().col_value)
+
+
+def _solve_scipy(model, integral):
+    from scipy.optimize import Bounds, LinearConstraint, linprog, milp
+    from scipy.sparse import csr_matrix, vstack
+
+    matrix = csr_matrix((model.data, model.indices, model.indptr),
+                        shape=(len(model.row_lower), len(model.objective)))
+    if not integral:
+        # Dual simplex returns a vertex; linprog only takes A_ub x <= b_ub, so flip the >= rows
+        upper = np.isfinite(model.row_upper)
+        lower = np.isfinite(model.row_lower)
+        result = linprog(-model.objective,
+                         A_ub=vstack([matrix[upper], -matrix[lower]]),
+                         b_ub=np.concatenate([model.row_upper[upper], -model.row_lower[lower]]),
+                         bounds=np.column_stack([model.col_lower, model.col_upper]),
+                         method="highs-ds")
+        return result.x if result.status == 0 else None
+
+    result = milp(-model.objective,
+                  constraints=LinearConstraint(matrix, model.row_lower, model.row_upper),
+                  bounds=Bounds(model.col_lower, model.col_upper),
+                  integrality=np.full(len(model.objective), int(integral)))
+    return result.x if result.status == 0 else None
+
+
+def solve_model(model, integral=True, start=None):
+    """Solve a CsrModel in-process with HiGHS; returns the column values, or None if not optimal.
+
+    start, column values of a feasible solution, seeds the MIP search (highspy only).
+    """
+    if not len(model.objective):
+        # HiGHS rejects empty models; the only question left is whether 0 meets every row
+        feasible = np.all(model.row_lower <= 0) and np.all(model.row_upper >= 0)
+        return model.objective if feasible else None
+    if highspy is not None:
+        return _solve_highspy(model, integral, start)
+    return _solve_scipy(model, integral)
+
+
+def solve_highs(instance, relax=False, assignment=None, start=None, phases=None):
+    """Solve a presolved instance with HiGHS in memory: no LP file, no solver subprocess.
+
+    With relax the LP relaxation is solved first and kept when its vertex is integral.
+    When assignment is a dict it receives the toys per (child, factory); start, a feasible
+    (child id, factory id) -> toys map, is the MIP's first incumbent. When phases is a dict
+    the build, solve and extract times are added to it.
+    """
+    from proj23 import lap_phase, report_relaxation
+
+    phases = {} if phases is None else phases
+    mark = perf_counter()
+    model = build_csr_model(instance)
+    start_values = None if start is None else assignment_vector(model, start)
+    mark = lap_phase(phases, "build", mark)
+    if relax:
+        start = perf_counter()
+        x = solve_model(model, integral=False)
+        lp_time = perf_counter() - start
+        if x is None:
+            lap_phase(phases, "solve", mark)
+            report_relaxation(lp_time, "infeasible")
+            return -1
+        if np.all(np.abs(x - np.rint(x)) <= 1e-6):
+            report_relaxation(lp_time, "integral")
+        else:
+            start = perf_counter()
+            x = solve_model(model, start=start_values)
+            report_relaxation(lp_time, "fractional", perf_counter() - start)
+    else:
+        x = solve_model(model, start=start_values)
+    mark = lap_phase(phases, "solve", mark)
+
+    if x is None:
+        return -1
+    if assignment is not None:
+        assignment.update(extract_assignment(model, x))
+    objective = extract_objective(model, x)
+    lap_phase(phases, "extract", mark)
+    return objective
+
+
+def solve_anytime(instance, deadline, assignment=None):
+    """Best solution of a presolved instance found by deadline (a time.time() value).
+
+    Returns (objective, bound): the best objective found and a proven upper bound on the optimum,
+    equal when it is optimal, both -1 when the instance is infeasible. The max-flow bounds come
+    first, in a fraction of the ILP time, with the greedy solution standing in when the flow has
+    none; that solution is handed to HiGHS as a start and HiGHS improves both sides until the
+    deadline. Without a start HiGHS runs past the deadline until it has a solution, so the answer
+    is never lost. Progress is reported to stderr. When assignment is a dict it receives the toys
+    per (child, factory) of the returned solution.
+    """
+    from flow_engine import NonNetworkInstance, flow_bounds
+    from proj23 import report_anytime
+
+    start = {}
+    try:
+        lower, upper = flow_bounds(instance, start)
+    except NonNetworkInstance:
+        lower, upper = -1, math.inf
+    if upper == -1:
+        return -1, -1
+    if lower == -1:
+        # No flow solution to start from; a greedy one may still meet every minimum
+        from greedy import greedy_assignment
+
+        objective, start, feasible = greedy_assignment(instance)
+        lower = objective if feasible else -1
+    report_anytime(deadline - time.time(), lower if lower != -1 else -math.inf, upper)
+    if lower == upper:
+        if assignment is not None:
+            assignment.update(start)
+        return lower, upper
+
+    model = build_csr_model(instance)
+    if highspy is None:
+        # No time limit or starting solution through scipy: solve to optimality
+        x = solve_model(model)
+        objective = -1 if x is None else extract_objective(model, x)
+        if x is not None and assignment is not None:
+            assignment.update(extract_assignment(model, x))
+        return objective, objective
+
+    solver = _highspy_solver(model, integral=True)
+    if lower != -1:
+        solution = highspy.HighsSolution()
+        solution.col_value = assignment_vector(model, start)
+        solver.setSolution(solution)
+        solver.setOptionValue("time_limit", max(deadline - time.time(), 0.0))
+    last = {"incumbent": float(lower), "bound": upper}
+
+    def progress(event):
+        # Report new incumbents and tighter bounds; past the deadline, stop once there is a solution
+        incumbent, bound = event.data_out.mip_primal_bound, min(event.data_out.mip_dual_bound, upper)
+        if incumbent > last["incumbent"] or bound < last["bound"] - 0.5:
+            last.update(incumbent=max(incumbent, last["incumbent"]), bound=min(bound, last["bound"]))
+            report_anytime(deadline - time.time(), last["incumbent"], last["bound"])
+        if time.time() >= deadline and math.isfinite(incumbent):
+            event.interrupt()
+
+    solver.cbMipImprovingSolution += progress
+    solver.cbMipInterrupt += progress
+    solver.run()
+
+    if solver.getModelStatus() == highspy.HighsModelStatus.kInfeasible:
+        return -1, -1
+    info = solver.getInfo()
+    objective, x = lower, None
+    if info.primal_solution_status == highspy.SolutionStatus.kSolutionStatusFeasible:
+        found = np.asarray(solver.getSolution().col_value)
+        if extract_objective(model, found) > objective:
+            objective, x = extract_objective(model, found), found
+    if objective == -1:
+        raise RuntimeError(f"HiGHS stopped without a solution ({solver.modelStatusToString(solver.getModelStatus())})")
+
+    # HiGHS calls a gap under mip_rel_gap optimal, so its dual bound is used even then; the
+    # objective is integral, so the fractional part of the bound can be dropped
+    bound = upper
+    if math.isfinite(info.mip_dual_bound):
+        bound = min(bound, math.floor(info.mip_dual_bound + 1e-6))
+    if assignment is not None:
+        assignment.update(start if x is None else extract_assignment(model, x))
+    return objective, max(bound, objective)
+
+
+if __name__ == "__main__":
+    from proj23 import solve_toy_distribution
+
+    solve_toy_distribution(sys.stdin.buffer.read(), solver="highs")
@@ -0,0 +1,156 @@
+import logging
+import sys
+from collections import namedtuple
+
+import numpy as np
+
+log = logging.getLogger("instance")
+
+# A parsed instance as flat int32 arrays. Factories, countries and children are addressed by
+# position; *_ids hold the ids from the input. factory_country and child_country are country
+# positions (-1 when the country is not listed). Child i requests the factories
+# request_factory[request_ptr[i]:request_ptr[i + 1]] (positions, sorted, no repeats) and
+# factory_ptr/factory_child is the transpose. child_count is 1 per child, or the size of an
+# aggregated bucket. NO_LIMIT in factory_stock or country_pmax marks a row that never binds;
+# a pmin of 0 asks for nothing.
+Instance = namedtuple("Instance", [
+    "factory_ids", "factory_country", "factory_stock",
+    "country_ids", "country_pmax", "country_pmin",
+    "child_ids", "child_country", "child_count",
+    "request_ptr", "request_factory", "factory_ptr", "factory_child",
+])
+
+NO_LIMIT = -1
+INDEX = np.int32
+
+
+def _positions(ids, wanted):
+    # Position of every wanted id in ids (unsorted, unique), -1 where it is missing
+    if not len(ids):
+        return np.full(len(wanted), -1, dtype=INDEX)
+    order = np.argsort(ids, kind="stable")
+    found = np.minimum(np.searchsorted(ids, wanted, sorter=order), len(ids) - 1)
+    return np.where(ids[order[found]] == wanted, order[found], -1).astype(INDEX)
+
+
+def _ptr(lengths):
+    ptr = np.zeros(len(lengths) + 1, dtype=INDEX)
+    np.cumsum(lengths, out=ptr[1:])
+    return ptr
+
+
+def edge_children(instance):
+    """Child position of every request edge, aligned with request_factory."""
+    return np.repeat(np.arange(len(instance.child_ids), dtype=INDEX), np.diff(instance.request_ptr))
+
+
+def factory_transpose(edge_child, edge_factory, num_factories):
+    """factory_ptr and factory_child of request edges given as child and factory positions,
+    sorted by child."""
+    order = np.argsort(edge_factory, kind="stable")
+    return _ptr(np.bincount(edge_factory, minlength=num_factories)), edge_child[order]
+
+
+def _assemble(factory_ids, factory_country, factory_stock, country_ids, country_pmax, country_pmin,
+              child_ids, child_country, child_count, edge_child, edge_factory):
+    # Sort and deduplicate the edges by (child, factory), then build both CSR directions. Rows
+    # taken from an instance are already sorted and unique, so only a check is paid for them;
+    # otherwise a plain sort and a neighbour comparison are much cheaper than np.unique
+    num_factories = max(len(factory_ids), 1)
+    keys = edge_child.astype(np.int64) * num_factories + edge_factory
+    if not (keys[1:] > keys[:-1]).all():
+        keys.sort()
+        keys = keys[np.append(True, keys[1:] != keys[:-1])]
+    edge_child, edge_factory = (part.astype(INDEX) for part in np.divmod(keys, num_factories))
+    factory_ptr, factory_child = factory_transpose(edge_child, edge_factory, len(factory_ids))
+    return Instance(
+        factory_ids=factory_ids.astype(INDEX), factory_country=factory_country.astype(INDEX),
+        factory_stock=factory_stock.astype(INDEX),
+        country_ids=country_ids.astype(INDEX), country_pmax=country_pmax.astype(INDEX),
+        country_pmin=country_pmin.astype(INDEX),
+        child_ids=child_ids.astype(INDEX), child_country=child_country.astype(INDEX),
+        child_count=child_count.astype(INDEX),
+        request_ptr=_ptr(np.bincount(edge_child, minlength=len(child_ids))), request_factory=edge_factory,
+        factory_ptr=factory_ptr, factory_child=factory_child,
+    )
+
+
+def build_instance(factory_rows, country_rows, child_ids, child_country_ids, request_lengths, requested_ids):
+    """Build an Instance from ids as they appear in the input.
+
+    factory_rows and country_rows are (k, 3) arrays of (id, country id, stock) and
+    (id, pmax, pmin); child i requests the factory ids requested_ids[sum(request_lengths[:i]):]
+    up to its own length. Requests of unknown factories and repeated requests are dropped.
+    """
+    factory_rows = np.asarray(factory_rows, dtype=np.int64).reshape(-1, 3)
+    country_rows = np.asarray(country_rows, dtype=np.int64).reshape(-1, 3)
+    child_ids = np.asarray(child_ids, dtype=np.int64)
+    factory_ids, country_ids = factory_rows[:, 0], country_rows[:, 0]
+
+    edge_child = np.repeat(np.arange(len(child_ids)), request_lengths)
+    edge_factory = _positions(factory_ids, np.asarray(requested_ids, dtype=np.int64))
+    known = edge_factory >= 0
+    return _assemble(factory_ids, _positions(country_ids, factory_rows[:, 1]), factory_rows[:, 2],
+                     country_ids, country_rows[:, 1], country_rows[:, 2],
+                     child_ids, _positions(country_ids, np.asarray(child_country_ids, dtype=np.int64)),
+                     np.ones(len(child_ids), dtype=INDEX), edge_child[known], edge_factory[known])
+
+
+def take(instance, factories, countries, children, edge_keep=None, factory_map=None, country_map=None):
+    """Sub-instance on the given (ascending) factory, country and child positions.
+
+    Edges survive when both ends are taken and edge_keep (a mask over request edges) allows
+    it. factory_map and country_map (old position -> new position, -1 when dropped) can be
+    passed in when many disjoint parts are taken from the same instance.
+    """
+    factories, countries, children = (np.asarray(positions, dtype=np.int64)
+                                      for positions in (factories, countries, children))
+    if factory_map is None:
+        factory_map = np.full(len(instance.factory_ids), -1, dtype=INDEX)
+        factory_map[factories] = np.arange(len(factories))
+    if country_map is None:
+        country_map = np.full(len(instance.country_ids), -1, dtype=INDEX)
+        country_map[countries] = np.arange(len(countries))
+
+    # A trailing -1 lets unlisted countries (-1) index it, also when there are no countries
+    padded_country_map = np.append(country_map, INDEX(-1)).astype(INDEX)
+
+    def remap_country(positions):
+        return padded_country_map[positions]
+
+    # Request edges of the taken children, gathered row by row
+    starts = instance.request_ptr[children]
+    lengths = instance.request_ptr[children + 1] - starts
+    offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    edges = np.repeat(starts, lengths) + offsets
+    edge_child = np.repeat(np.arange(len(children)), lengths)
+    edge_factory = factory_map[instance.request_factory[edges]]
+    keep = edge_factory >= 0
+    if edge_keep is not None:
+        keep &= edge_keep[edges]
+
+    return _assemble(instance.factory_ids[factories], remap_country(instance.factory_country[factories]),
+                     instance.factory_stock[factories],
+                     instance.country_ids[countries], instance.country_pmax[countries],
+                     instance.country_pmin[countries],
+                     instance.child_ids[children], remap_country(instance.child_country[children]),
+                     instance.child_count[children], edge_child[keep], edge_factory[keep])
+
+
+def memory_bytes(instance):
+    return sum(array.nbytes for array in instance)
+
+
+def log_memory(instance):
+    children = len(instance.child_ids)
+    total = memory_bytes(instance)
+    log.info("instance: %d factories, %d countries, %d children, %d requests in %d bytes (%.1f bytes per child)",
+             len(instance.factory_ids), len(instance.country_ids), children, len(instance.request_factory),
+             total, total / max(children, 1))
+
+
+if __name__ == "__main__":
+    from proj23 import parse_input
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    log_memory(parse_input(sys.stdin.buffer.read()))
@@ -0,0 +1,118 @@
+import argparse
+import mmap
+import os
+import struct
+import sys
+
+import numpy as np
+
+from instance import INDEX, Instance
+
+# Binary instance: MAGIC, version and field count, one record per Instance field, then the
+# array data. A field that is an arithmetic progression (ids numbered 1..n, child_count all
+# ones) is stored as its first value and step only; any other field as little-endian int32,
+# starting on a 64-byte boundary, so loading maps it without a copy. Compact files store those
+# fields in the narrowest signed width that holds their values instead, and pay a widening
+# copy per field on load.
+MAGIC = b"TOYINST\0"
+VERSION = 3
+SUFFIX = ".inst"
+ALIGN = 64
+WIDTHS = [np.dtype("<i1"), np.dtype("<i2"), np.dtype("<i4")]
+_HEADER = struct.Struct("<8sII")
+# Per field: element count, byte width (0 for a progression), first value and step
+_FIELD = struct.Struct("<QBqq")
+
+
+def _aligned(offset):
+    return -(-offset // ALIGN) * ALIGN
+
+
+def is_binary(data):
+    return bytes(data[:len(MAGIC)]) == MAGIC
+
+
+def _encode(array, compact):
+    # (byte width, first, step, data) of one field; width 0 and no data for a progression
+    array = np.asarray(array, dtype=np.int64)
+    if len(array) < 2:
+        return 0, int(array[0]) if len(array) else 0, 0, b""
+    step = int(array[1] - array[0])
+    if (np.diff(array) == step).all():
+        return 0, int(array[0]), step, b""
+    low, high = int(array.min()), int(array.max())
+    dtype = next(dtype for dtype in WIDTHS[0 if compact else -1:]
+                 if np.iinfo(dtype).min <= low and high <= np.iinfo(dtype).max)
+    return dtype.itemsize, 0, 0, array.astype(dtype).tobytes()
+
+
+def dump_instance(instance, compact=False):
+    """Serialize an Instance into the binary format; compact trades zero-copy loading for size."""
+    fields = [(len(array), *_encode(array, compact)) for array in instance]
+    chunks = [_HEADER.pack(MAGIC, VERSION, len(fields))] + [_FIELD.pack(*field[:4]) for field in fields]
+    offset = _HEADER.size + _FIELD.size * len(fields)
+    for *_, data in fields:
+        if data:
+            padding = _aligned(offset) - offset
+            chunks += [b"\0" * padding, data]
+            offset += padding + len(data)
+    return b"".join(chunks)
+
+
+def instance_from_buffer(buffer):
+    """Instance read from buffer (bytes, or an mmap).
+
+    Fields stored as int32 are read-only views into buffer, without copies; the narrower
+    fields of compact files are widened and progressions expanded into int32 arrays.
+    """
+    magic, version, count = _HEADER.unpack_from(buffer)
+    if magic != MAGIC or version != VERSION or count != len(Instance._fields):
+        raise ValueError(f"not a version {VERSION} binary instance (convert the text instance again)")
+    arrays = []
+    offset = _HEADER.size + _FIELD.size * count
+    for index in range(count):
+        length, width, first, step = _FIELD.unpack_from(buffer, _HEADER.size + _FIELD.size * index)
+        if not width:
+            arrays.append((first + step * np.arange(length, dtype=np.int64)).astype(INDEX))
+            continue
+        offset = _aligned(offset)
+        data = np.frombuffer(buffer, dtype=WIDTHS[width.bit_length() - 1], count=length, offset=offset)
+        arrays.append(data.astype(INDEX, copy=False))
+        offset += length * width
+    return Instance(*arrays)
+
+
+def load_instance(path):
+    """Memory-map a binary instance file; pages are only read as the arrays are touched."""
+    with open(path, "rb") as handle:
+        mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+    return instance_from_buffer(mapped)
+
+
+def convert(paths, output_dir=None, compact=False):
+    # Text instance -> binary file next to it (or in output_dir), same name with SUFFIX
+    from proj23 import parse_input
+
+    for path in paths:
+        with open(path, "rb") as handle:
+            instance = parse_input(handle.read())
+        target = os.path.splitext(os.path.basename(path))[0] + SUFFIX
+        target = os.path.join(output_dir or os.path.dirname(path), target)
+        with open(target, "wb") as handle:
+            handle.write(dump_instance(instance, compact))
+        print(f"{path} -> {target} ({os.path.getsize(path)} -> {os.path.getsize(target)} bytes)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Binary instance files")
+    commands = parser.add_subparsers(dest="command", required=True)
+    convert_parser = commands.add_parser("convert", help=f"write a {SUFFIX} file for each text instance")
+    convert_parser.add_argument("paths", nargs="+")
+    convert_parser.add_argument("-o", "--output-dir", help="directory for the binary files (default: next to each input)")
+    convert_parser.add_argument("--compact", action="store_true",
+                                help="narrowest integer width per field: smaller files, copied on load")
+    args = parser.parse_args()
+
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+    convert(args.paths, args.output_dir, args.compact)
@@ -1,23 +1,54 @@
-import random
-import time
+import argparse
+import contextlib
 import csv
+import io
+import itertools
+import multiprocessing
+import os
+import queue
+import threading
+from time import perf_counter
 
-def run_generator(num_factories, num_countries, num_children, variance, max_cap, max_requests):
-    num_variables = 0
-    num_restrictions = 0
-    start_time = time.time()
+from warm_worker import WarmWorker, WorkerError
 
-    # Simular o cálculo do número de variáveis e restrições
-    num_variables = num_factories + num_children
-    num_restrictions = num_factories + num_children + num_countries
+FIELDNAMES = ['num_factories', 'num_countries', 'num_children', 'variance', 'generation_time',
+              'execution_time', 'num_variables', 'num_restrictions', 'num_nonzeros', 'result']
 
-    # Simular tempo de execução
-    time.sleep(random.uniform(0.01, 0.1))  # Simula tempo de execução variável
-    execution_time = time.time() - start_time
+def run_generator(num_factories, num_countries, num_children, variance, max_cap, max_requests,
+                  engine="ilp", solver="cbc", seed=None):
+    from proj23 import solve_toy_distribution
+    from test_generator import generate_test_case
 
-    return num_variables, num_restrictions, execution_time
+    # Gerar a instância com o test_generator (semente fixa por ponto) e resolvê-la com o proj23
+    start = perf_counter()
+    input_data = generate_test_case(num_factories, num_countries, num_children, variance, max_cap, max_requests,
+                                    seed)
+    generation_time = perf_counter() - start
+    stats = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        solve_toy_distribution(input_data, engine=engine, solver=solver, stats=stats)
 
-def collect_data(output_file):
+    # Tamanho medido do modelo resolvido (depois do presolve) e tempo total da resolução
+    model = stats.get("model", {})
+    return {'generation_time': generation_time, 'execution_time': stats["phases"]["total"],
+            'num_variables': model.get("variables", 0), 'num_restrictions': model.get("constraints", 0),
+            'num_nonzeros': model.get("nonzeros", 0), 'result': stats["result"]}
+
+def _run_point(job):
+    # Executado no processo de trabalho, que já importou o solver
+    point, seed, engine, solver = job
+    return run_generator(*point, engine=engine, solver=solver, seed=seed)
+
+def run_point(worker, job, timeout):
+    # Um ponto num processo de trabalho; erros e tempo limite ficam registados na coluna result
+    try:
+        return worker.call(job, timeout)
+    except WorkerError as error:
+        if error.timed_out:
+            return {'result': "timeout", 'execution_time': timeout}
+        return {'result': f"error: {error}"}
+
+def collect_data(output_file, jobs=0, timeout=120, engine="ilp", solver="cbc", seed=0):
     # Parâmetros grandes e complexos
     factories_range = [100, 500, 1000, 2000, 5000]
     countries_range = [10, 50, 100, 200, 500]
@@ -26,29 +57,51 @@ def collect_data(output_file):
     max_capacity = 10000
     max_requests = 50
 
+    points = [(factories, countries, children, variance, max_capacity, max_requests)
+              for factories, countries, children, variance
+              in itertools.product(factories_range, countries_range, children_range, variance_range)]
+
+    # Os pontos maiores primeiro, para que nenhum deles comece no fim e atrase a varredura
+    pending = queue.Queue()
+    for index in sorted(range(len(points)), key=lambda index: points[index][0] * points[index][2], reverse=True):
+        pending.put(index)
+    results = {}
+
+    def drain(worker):
+        while True:
+            try:
+                index = pending.get_nowait()
+            except queue.Empty:
+                return
+            factories, countries, children, variance = points[index][:4]
+            results[index] = run_point(worker, (points[index], seed + index, engine, solver), timeout)
+            print(f"Instância resolvida: Factories={factories}, Countries={countries}, Children={children}, "
+                  f"Variance={variance} -> {results[index]['result']}", flush=True)
+
+    # Threads só esperam pelos pipes; o trabalho é feito nos processos (spawn, seguro com threads)
+    context = multiprocessing.get_context("spawn")
+    threads = [threading.Thread(target=drain, args=(WarmWorker(context, _run_point, engine, solver),))
+               for _ in range(jobs or os.cpu_count())]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
     with open(output_file, 'w', newline='') as csvfile:
-        fieldnames = ['num_factories', 'num_countries', 'num_children', 'variance', 
-                      'execution_time', 'num_variables', 'num_restrictions']
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+        writer = csv.DictWriter(csvfile, fieldnames=FIELDNAMES)
         writer.writeheader()
-
-        for factories in factories_range:
-            for countries in countries_range:
-                for children in children_range:
-                    for variance in variance_range:
-                        num_variables, num_restrictions, execution_time = run_generator(
-                            factories, countries, children, variance, max_capacity, max_requests)
-                        
-                        writer.writerow({
-                            'num_factories': factories,
-                            'num_countries': countries,
-                            'num_children': children,
-                            'variance': variance,
-                            'execution_time': execution_time,
-                            'num_variables': num_variables,
-                            'num_restrictions': num_restrictions
-                        })
-                        print(f"Instância gerada: Factories={factories}, Countries={countries}, Children={children}, Variance={variance}")
+        for index, (factories, countries, children, variance, _, _) in enumerate(points):
+            writer.writerow({'num_factories': factories, 'num_countries': countries, 'num_children': children,
+                             'variance': variance, **results[index]})
 
 if __name__ == "__main__":
-    collect_data("experiment_results.csv")
+    parser = argparse.ArgumentParser(description="Varredura de tamanhos: gera, resolve e mede uma instância por ponto")
+    parser.add_argument("-o", "--output", default="experiment_results.csv")
+    parser.add_argument("-j", "--jobs", type=int, default=0, help="processos (0: todos os núcleos)")
+    parser.add_argument("--timeout", type=float, default=120, help="segundos por ponto antes de matar o processo")
+    parser.add_argument("--engine", choices=["ilp", "flow", "greedy"], default="ilp")
+    parser.add_argument("--solver", choices=["glpk", "cbc", "highs", "portfolio"], default="cbc")
+    parser.add_argument("--seed", type=int, default=0, help="semente base; o ponto i usa seed + i")
+    args = parser.parse_args()
+
+    collect_data(args.output, args.jobs, args.timeout, args.engine, args.solver, args.seed)
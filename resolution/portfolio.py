@@ -0,0 +1,197 @@
+import argparse
+import asyncio
+import importlib.util
+import json
+import os
+import sys
+import tempfile
+from collections import Counter, defaultdict
+from time import perf_counter
+
+import pulp
+from pulp import constants
+
+from startup import PORTFOLIO_LOG
+
+# Statuses that settle the model: the first backend to report one wins the race
+PROVEN = {constants.LpStatusOptimal: "optimal", constants.LpStatusInfeasible: "infeasible"}
+
+
+def size_class(variables):
+    """Instance class used to compare backends: the decade of the variable count."""
+    return f"<1e{len(str(variables))} vars"
+
+
+class PortfolioSolver(pulp.LpSolver):
+    """PuLP solver that runs CBC, GLPK and HiGHS on the same model at once and keeps the first
+    proven optimum or infeasibility; the other solver processes are killed.
+
+    paths maps "cbc" and "glpk" to their binaries (missing ones are left out); HiGHS runs as a
+    Python subprocess when highspy is installed. Every race is appended to log_path as a JSON line.
+    """
+
+    name = "portfolio"
+
+    def __init__(self, paths, log_path=PORTFOLIO_LOG, **kwargs):
+        super().__init__(msg=False, **kwargs)
+        self.paths = dict(paths)
+        if importlib.util.find_spec("highspy") is not None:
+            self.paths["highs"] = sys.executable
+        self.log_path = log_path
+        self.winner = None
+
+    def available(self):
+        return bool(self.paths)
+
+    def actualSolve(self, lp):
+        with tempfile.TemporaryDirectory(prefix="portfolio-") as tmp:
+            mps, lp_file = os.path.join(tmp, "model.mps"), os.path.join(tmp, "model.lp")
+            _, variable_names, constraint_names, _ = lp.writeMPS(mps, rename=1)
+            if "glpk" in self.paths:
+                lp.writeLP(lp_file, writeSOS=0)
+            maximize = lp.sense == constants.LpMaximize
+
+            # Solver name -> (command, reader of its files into (status, values by variable name))
+            renamed = {new: old for old, new in variable_names.items()}
+            runs = {}
+            if "cbc" in self.paths:
+                solution = os.path.join(tmp, "cbc.sol")
+                command = [self.paths["cbc"], mps] + ["-max"] * maximize + ["-solve", "-printingOptions", "all",
+                                                                            "-solution", solution]
+                runs["cbc"] = (command, lambda solution=solution: pulp.COIN_CMD(path=self.paths["cbc"]).readsol_MPS(
+                    solution, lp, lp.variables(), variable_names, constraint_names)[:2])
+            if "glpk" in self.paths:
+                output, solution = os.path.join(tmp, "glpk.out"), os.path.join(tmp, "glpk.sol")
+                command = [self.paths["glpk"], "--cpxlp", lp_file, "-o", output, "-w", solution]
+                runs["glpk"] = (command, lambda output=output, solution=solution:
+                                pulp.GLPK_CMD(path=self.paths["glpk"]).readsol(output, solution))
+            if "highs" in self.paths:
+                solution = os.path.join(tmp, "highs.json")
+                command = [sys.executable, os.path.abspath(__file__), "highs", mps, solution] + ["--max"] * maximize
+                runs["highs"] = (command, lambda solution=solution: read_highs_solution(solution, renamed))
+
+            winner, status, values, finished = asyncio.run(race(runs, self.timeLimit))
+            finished.update({name: "stopped" for name in runs if name not in finished})
+
+        self.winner = winner
+        self.record(lp, winner, status, finished)
+        if winner is None:
+            raise pulp.PulpSolverError(f"portfolio: no solver proved a result ({finished})")
+        print(f"portfolio: {winner} proved {PROVEN[status]} in {finished[winner]:.3f}s", file=sys.stderr)
+        lp.assignVarsVals(values)
+        lp.assignStatus(status)
+        return status
+
+    def record(self, lp, winner, status, finished):
+        # One line per race, for learning which backend wins on which class of instance
+        variables = len(lp.variables())
+        entry = {"class": size_class(variables), "variables": variables, "constraints": len(lp.constraints),
+                 "mip": bool(lp.isMIP()), "winner": winner, "status": PROVEN.get(status), "finished": finished}
+        try:
+            os.makedirs(os.path.dirname(self.log_path) or ".", exist_ok=True)
+            with open(self.log_path, "a") as handle:
+                handle.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        except OSError:
+            pass  # the log is a convenience; the answer does not depend on it
+
+
+async def _run(name, command, read):
+    # Run one solver to completion; on cancellation (another solver won) kill it
+    start = perf_counter()
+    process = await asyncio.create_subprocess_exec(*command, stdin=asyncio.subprocess.DEVNULL,
+                                                   stdout=asyncio.subprocess.DEVNULL,
+                                                   stderr=asyncio.subprocess.DEVNULL)
+    try:
+        code = await process.wait()
+    except asyncio.CancelledError:
+        process.kill()
+        await process.wait()
+        raise
+    if code != 0:
+        return name, perf_counter() - start, f"exit status {code}", None
+    try:
+        status, values = read()
+    except (OSError, ValueError, pulp.PulpSolverError) as error:
+        return name, perf_counter() - start, f"unreadable solution: {error}", None
+    return name, perf_counter() - start, status, values
+
+
+async def race(runs, timeout=None):
+    """Start every solver in runs (name -> (command, read)); returns (winner, status, values,
+    finished), where finished maps each solver that ended to its seconds or why it failed."""
+    tasks = [asyncio.create_task(_run(name, command, read)) for name, (command, read) in runs.items()]
+    finished = {}
+    try:
+        for next_done in asyncio.as_completed(tasks, timeout=timeout):
+            name, seconds, status, values = await next_done
+            if status in PROVEN:
+                finished[name] = round(seconds, 6)
+                return name, status, values, finished
+            finished[name] = status if isinstance(status, str) else f"status {constants.LpStatus[status]}"
+    except asyncio.TimeoutError:
+        pass
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    return None, constants.LpStatusNotSolved, {}, finished
+
+
+def read_highs_solution(path, renamed):
+    with open(path) as handle:
+        solution = json.load(handle)
+    return solution["status"], {renamed.get(name, name): value for name, value in solution["values"].items()}
+
+
+def solve_highs_file(mps, solution, maximize):
+    # Subprocess side of the HiGHS entry: solve the MPS file and write status and values as JSON
+    import highspy
+
+    solver = highspy.Highs()
+    solver.setOptionValue("output_flag", False)
+    solver.readModel(mps)
+    if maximize:
+        solver.changeObjectiveSense(highspy.ObjSense.kMaximize)
+    solver.run()
+    model_status = solver.getModelStatus()
+    status = {highspy.HighsModelStatus.kOptimal: constants.LpStatusOptimal,
+              highspy.HighsModelStatus.kInfeasible: constants.LpStatusInfeasible}.get(model_status,
+                                                                                      constants.LpStatusUndefined)
+    values = {}
+    if status == constants.LpStatusOptimal:
+        values = dict(zip(solver.getLp().col_names_, solver.getSolution().col_value))
+    with open(solution, "w") as handle:
+        json.dump({"status": status, "values": values}, handle)
+
+
+def summarize(log_path):
+    """Wins per instance class and backend, and the backend each class should try first."""
+    wins, times = defaultdict(Counter), defaultdict(lambda: defaultdict(list))
+    with open(log_path) as handle:
+        for line in handle:
+            entry = json.loads(line)
+            if entry["winner"]:
+                wins[entry["class"]][entry["winner"]] += 1
+                times[entry["class"]][entry["winner"]].append(entry["finished"][entry["winner"]])
+    for size in sorted(wins, key=lambda size: int(size[3:].split()[0])):
+        counts = wins[size]
+        best = max(counts, key=lambda name: (counts[name], -sorted(times[size][name])[len(times[size][name]) // 2]))
+        scores = ", ".join(f"{name} {count}" for name, count in counts.most_common())
+        print(f"{size:<14} races {sum(counts.values()):>6}  wins: {scores}  -> prefer {best}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Solver portfolio: race log summary and the HiGHS subprocess entry")
+    commands = parser.add_subparsers(dest="command", required=True)
+    stats = commands.add_parser("stats", help="wins per instance class from the race log")
+    stats.add_argument("--log", default=PORTFOLIO_LOG)
+    highs = commands.add_parser("highs", help="solve an MPS file with HiGHS (used by the portfolio itself)")
+    highs.add_argument("mps")
+    highs.add_argument("solution")
+    highs.add_argument("--max", action="store_true")
+    args = parser.parse_args()
+
+    if args.command == "stats":
+        summarize(args.log)
+    else:
+        solve_highs_file(args.mps, args.solution, args.max)
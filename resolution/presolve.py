@@ -0,0 +1,220 @@
+import logging
+import sys
+from collections import namedtuple
+
+import numpy as np
+
+from instance import INDEX, NO_LIMIT, edge_children, take
+
+log = logging.getLogger("presolve")
+
+# Reduced instance plus what presolve decided on its own: fixed holds the (child id, factory id)
+# assignments forced to 1, which count towards the objective on top of the reduced problem.
+# Dropped rows are marked in the reduced instance: stock / pmax set to NO_LIMIT and pmin set
+# to 0 mean the constraint can never bind.
+Presolved = namedtuple("Presolved", ["instance", "fixed", "infeasible", "reductions"])
+
+
+def presolve(instance):
+    """Reduce a parsed instance with a degree-counter worklist in O(edges) total.
+
+    Removes zero-stock and unrequested factories, children left without a live factory and
+    export edges of countries with no export capacity. A child that must be served (its
+    country needs every live child) and has a single live factory is fixed to it. Finally
+    stocks are capped at demand, export caps at the exports that can actually be reached, and
+    constraints that can no longer bind are dropped. Detects pmin that cannot be met.
+
+    The adjacency is the instance's own CSR arrays in both directions plus a live mask over
+    the request edges; only degree counters change as edges die.
+    """
+    reductions = dict.fromkeys(["factories", "children", "edges", "fixed", "stock_rows",
+                                "export_rows", "delivery_rows", "countries"], 0)
+    num_factories, num_countries = len(instance.factory_ids), len(instance.country_ids)
+    num_children, num_edges = len(instance.child_ids), len(instance.request_factory)
+    unlimited = np.iinfo(np.int64).max
+    max_export = [float("inf") if value == NO_LIMIT else value for value in instance.country_pmax.tolist()]
+    min_delivery = instance.country_pmin.tolist()
+
+    # Per-element reads and writes go through memoryviews of the arrays, which cost no Python
+    # object per entry. factory_edge maps the transpose (factory_ptr order) to request edges.
+    edge_child_array = edge_children(instance)
+    factory_edge_array = np.argsort(instance.request_factory, kind="stable").astype(INDEX)
+    stock_array = np.where(instance.factory_stock == NO_LIMIT, unlimited, instance.factory_stock).astype(np.int64)
+    child_degree_array = np.diff(instance.request_ptr).astype(np.int64)
+    factory_degree_array = np.diff(instance.factory_ptr).astype(np.int64)
+    request_ptr, request_factory = memoryview(instance.request_ptr), memoryview(instance.request_factory)
+    factory_ptr, factory_edge = memoryview(instance.factory_ptr), memoryview(factory_edge_array)
+    edge_child, child_country = memoryview(edge_child_array), memoryview(instance.child_country)
+    factory_country, stock = memoryview(instance.factory_country), memoryview(stock_array)
+    child_degree, factory_degree = memoryview(child_degree_array), memoryview(factory_degree_array)
+    live = bytearray(b"\x01") * num_edges
+    live_child, live_factory = bytearray(b"\x01") * num_children, bytearray(b"\x01") * num_factories
+
+    # Factories and live children per country
+    def by_country(countries):
+        listed = np.flatnonzero(countries >= 0)
+        order = listed[np.argsort(countries[listed], kind="stable")]
+        split = np.cumsum(np.bincount(countries[listed], minlength=num_countries))[:-1]
+        return [group.tolist() for group in np.split(order, split)] if num_countries else []
+
+    country_factories = by_country(instance.factory_country)
+    country_children = by_country(instance.child_country)
+    listed_children = instance.child_country[instance.child_country >= 0]
+    live_children = np.bincount(listed_children, minlength=num_countries).tolist()
+
+    factory_worklist = np.flatnonzero((stock_array <= 0) | (factory_degree_array == 0)).tolist()
+    child_worklist = np.flatnonzero(child_degree_array <= 1).tolist()
+    country_worklist = list(range(num_countries))
+    tight = set()  # countries that need every live child served; stays true once reached
+    closed = set()  # countries whose export capacity ran out
+    fixed = []
+    infeasible = False
+
+    def remove_edge(edge):
+        live[edge] = 0
+        child, factory = edge_child[edge], request_factory[edge]
+        child_degree[child] -= 1
+        factory_degree[factory] -= 1
+        reductions["edges"] += 1
+        if not factory_degree[factory]:
+            factory_worklist.append(factory)
+        if child_degree[child] <= 1:
+            child_worklist.append(child)
+
+    def remove_factory(factory):
+        live_factory[factory] = 0
+        reductions["factories"] += 1
+        for position in range(factory_ptr[factory], factory_ptr[factory + 1]):
+            edge = factory_edge[position]
+            if live[edge]:
+                live[edge] = 0
+                child = edge_child[edge]
+                child_degree[child] -= 1
+                reductions["edges"] += 1
+                if child_degree[child] <= 1:
+                    child_worklist.append(child)
+        factory_degree[factory] = 0
+
+    def remove_child(child):
+        live_child[child] = 0
+        for edge in range(request_ptr[child], request_ptr[child + 1]):
+            if live[edge]:
+                live[edge] = 0
+                factory = request_factory[edge]
+                factory_degree[factory] -= 1
+                if not factory_degree[factory]:
+                    factory_worklist.append(factory)
+        child_degree[child] = 0
+        country = child_country[child]
+        if country >= 0:
+            live_children[country] -= 1
+            country_worklist.append(country)
+
+    while factory_worklist or child_worklist or country_worklist:
+        while factory_worklist:
+            factory = factory_worklist.pop()
+            if live_factory[factory] and (stock[factory] <= 0 or not factory_degree[factory]):
+                remove_factory(factory)
+
+        while child_worklist:
+            child = child_worklist.pop()
+            if not live_child[child]:
+                continue
+            if not child_degree[child]:
+                remove_child(child)
+                reductions["children"] += 1
+                continue
+            country = child_country[child]
+            if country not in tight:
+                continue
+
+            # Every live child of this country must be served and this one has a single option
+            factory = next(request_factory[edge] for edge in range(request_ptr[child], request_ptr[child + 1])
+                           if live[edge])
+            fixed.append((int(instance.child_ids[child]), int(instance.factory_ids[factory])))
+            reductions["fixed"] += 1
+            remove_child(child)
+            min_delivery[country] -= 1
+            stock[factory] -= 1
+            if stock[factory] <= 0:
+                # Drop it right away so no other forced child can claim the same toy
+                remove_factory(factory)
+            source_country = factory_country[factory]
+            if source_country != country and source_country >= 0:
+                max_export[source_country] -= 1
+                country_worklist.append(source_country)
+
+        while country_worklist:
+            country = country_worklist.pop()
+            if min_delivery[country] > live_children[country] or max_export[country] < 0:
+                infeasible = True
+                break
+            if country not in tight and 0 < min_delivery[country] == live_children[country]:
+                tight.add(country)
+                child_worklist.extend(child for child in country_children[country]
+                                      if live_child[child] and child_degree[child] <= 1)
+            if country not in closed and max_export[country] == 0:
+                # No export capacity left: every cross-border edge out of this country is dead
+                closed.add(country)
+                for factory in country_factories[country]:
+                    for position in range(factory_ptr[factory], factory_ptr[factory + 1]):
+                        edge = factory_edge[position]
+                        if live[edge] and child_country[edge_child[edge]] != country:
+                            remove_edge(edge)
+        if infeasible:
+            break
+
+    if infeasible:
+        log.info("presolve: infeasible (pmin cannot be met or exports over capacity)")
+        empty = np.zeros(0, dtype=int)
+        return Presolved(take(instance, empty, empty, empty), fixed, True, reductions)
+
+    # Cap stocks at demand, dropping the ones that cannot bind
+    edge_keep = np.frombuffer(live, dtype=bool)
+    kept_factories = np.flatnonzero(np.frombuffer(live_factory, dtype=bool))
+    binding = stock_array < factory_degree_array
+    reductions["stock_rows"] += int(np.count_nonzero(~binding[kept_factories]))
+    new_stock = np.where(binding, stock_array, NO_LIMIT).astype(instance.factory_stock.dtype)
+
+    # Cap export caps at the reachable exports: per country, the foreign children its live
+    # factories can serve, each factory at most its stock, and at most one toy per child
+    source = instance.factory_country[instance.request_factory]
+    foreign = edge_keep & (source >= 0) & (source != instance.child_country[edge_child_array])
+    foreign_degree = np.bincount(instance.request_factory[foreign], minlength=num_factories)
+    exporting = kept_factories[instance.factory_country[kept_factories] >= 0]
+    reachable = np.bincount(instance.factory_country[exporting], minlength=num_countries,
+                            weights=np.minimum(stock_array[exporting], foreign_degree[exporting]))
+    pairs = np.sort(source[foreign].astype(np.int64) * max(num_children, 1) + edge_child_array[foreign])
+    distinct = pairs[np.append(True, pairs[1:] != pairs[:-1])] if len(pairs) else pairs
+    foreign_children = np.bincount(distinct // max(num_children, 1), minlength=num_countries)
+
+    new_pmax = instance.country_pmax.copy()
+    new_pmin = instance.country_pmin.copy()
+    kept_countries = []
+    for country, exports in enumerate(np.minimum(reachable, foreign_children).tolist()):
+        export_binding = max_export[country] < exports
+        reductions["export_rows"] += not export_binding
+        reductions["delivery_rows"] += min_delivery[country] <= 0
+        if not export_binding and min_delivery[country] <= 0 and not live_children[country]:
+            reductions["countries"] += 1
+            continue
+        kept_countries.append(country)
+        new_pmax[country] = max_export[country] if export_binding else NO_LIMIT
+        new_pmin[country] = max(min_delivery[country], 0)
+
+    reduced = take(instance._replace(factory_stock=new_stock, country_pmax=new_pmax, country_pmin=new_pmin),
+                   kept_factories, kept_countries, np.flatnonzero(np.frombuffer(live_child, dtype=bool)),
+                   edge_keep=edge_keep)
+    log.info("presolve: removed %(factories)d factories, %(children)d children, %(edges)d edges, "
+             "%(countries)d countries; fixed %(fixed)d assignments; dropped %(stock_rows)d stock, "
+             "%(export_rows)d export and %(delivery_rows)d delivery rows", reductions)
+    return Presolved(reduced, fixed, False, reductions)
+
+
+if __name__ == "__main__":
+    from proj23 import parse_input
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    result = presolve(parse_input(sys.stdin.buffer.read()))
+    print(f"{len(result.instance.factory_ids)} factories, {len(result.instance.country_ids)} countries, "
+          f"{len(result.instance.child_ids)} children left")
@@ -1,83 +1,463 @@
 import sys
-from pulp import *
+from time import perf_counter, time
 
+STARTED = perf_counter()
+MODULES_AT_START = len(sys.modules)
 
-def solve_toy_distribution(input_data):
-    # Input Parsing
-    lines = input_data.strip().split("\n")
-    n, m = map(int, lines[0].split())
+import argparse
+import json
+import logging
+import math
+import os
+import shutil
+from functools import partial
 
-    # Parse factories
-    factories = {int(line.split()[0]): {"country_id": int(line.split()[1]), "stock": int(line.split()[2])}
-                 for line in lines[1:n + 1]}
+import numpy as np
 
-    # Parse countries
-    countries = {int(line.split()[0]): {"max_export": int(line.split()[1]), "min_delivery": int(line.split()[2])}
-                 for line in lines[n + 1:n + 1 + m]}
+from aggregation import aggregate_children, expand_assignment
+from components import solve_components, split_components
+from feasibility import precheck
+from instance import NO_LIMIT, Instance, edge_children, log_memory
+from instance_file import instance_from_buffer, is_binary
+from presolve import presolve
+from reader import read_instance
+from startup import RESULT_CACHE, cached_solver_path, import_times, load, startup_report
 
-    # Parse children
-    children = [{"id": int(line.split()[0]), "country_id": int(line.split()[1]), "requests": list(map(int, line.split()[2:]))}
-                for line in lines[n + 1 + m:]]
+# NumPy is needed from parsing on, since instances are arrays; PuLP and the solver backends
+# are imported through load() only once a backend runs.
+import_times.append(("proj23 + NumPy", perf_counter() - STARTED, len(sys.modules) - MODULES_AT_START))
 
-    # Eliminate unnecessary data iteratively
-    while True:
-        # Filter factories with stock > 0 and requested by at least one child
-        requested_factories = set(factory_id for child in children for factory_id in child["requests"])
-        factories = {factory_id: details for factory_id, details in factories.items()
-                     if factory_id in requested_factories and details["stock"] > 0}
+# Command-line solvers PuLP drives through an LP file and a subprocess: PuLP class and binary
+PULP_SOLVERS = {"glpk": ("GLPK_CMD", "glpsol"), "cbc": ("COIN_CMD", "cbc")}
 
-        # Filter children that can request from at least one remaining factory
-        children = [child for child in children if any(factory_id in factories for factory_id in child["requests"])]
 
-        # Filter countries connected to active children or factories
-        relevant_countries = set(child["country_id"] for child in children).union(
-            factory["country_id"] for factory in factories.values())
-        countries = {country_id: details for country_id, details in countries.items()
-                     if country_id in relevant_countries}
+def solver_path(pulp, solver):
+    """Binary of a command-line solver, cached between runs; None when it is not installed."""
+    command, binary = PULP_SOLVERS[solver]
 
-        # Check if pruning is complete (no further changes)
-        if not requested_factories - factories.keys():
-            break
+    def discover():
+        # CBC is the binary bundled with PuLP, as PULP_CBC_CMD would run
+        return os.path.realpath(pulp.PULP_CBC_CMD().path) if solver == "cbc" else shutil.which(binary)
+
+    return cached_solver_path(solver, discover)
+
+
+def pulp_solver(pulp, solver, warm_start=False):
+    """PuLP command for solver, or for "portfolio" one racing every installed solver.
+
+    With warm_start CBC reads the variables' initial values as a MIP start; GLPK_CMD has no such
+    option and the portfolio writes its model without them, so neither gets one.
+    """
+    if solver == "portfolio":
+        paths = {name: solver_path(pulp, name) for name in PULP_SOLVERS}
+        return load("portfolio").PortfolioSolver({name: path for name, path in paths.items() if path})
+    options = {"warmStart": warm_start} if solver == "cbc" else {}
+    return getattr(pulp, PULP_SOLVERS[solver][0])(path=solver_path(pulp, solver), msg=0, **options)
+
+
+def preload(engine="ilp", solver="glpk"):
+    """Import the modules a run with this engine and solver needs, e.g. in a warm worker."""
+    if engine != "ilp":
+        load({"flow": "flow_engine", "greedy": "greedy"}[engine])
+    load({"highs": "highs_backend", "portfolio": "portfolio"}.get(solver, "pulp"))
+
+
+def _group(keys, num_groups, mask=None):
+    # Edge positions grouped by key (ascending within each group), one list per group
+    positions = np.arange(len(keys)) if mask is None else np.flatnonzero(mask)
+    order = positions[np.argsort(keys[positions], kind="stable")]
+    bounds = np.cumsum(np.bincount(keys[positions], minlength=num_groups))[:-1]
+    return [group.tolist() for group in np.split(order, bounds)] if num_groups else []
+
+
+def build_edge_indexes(instance):
+    """Group the request edges by the constraints they appear in.
+
+    Returns the (child id, factory id) key of every edge plus, per child, per factory, per
+    exporting country and per receiving country position, the edge positions each constraint
+    sums over. Works on the instance arrays in a few vectorized passes.
+    """
+    child = edge_children(instance)
+    factory = instance.request_factory
+    edges = list(zip(instance.child_ids[child].tolist(), instance.factory_ids[factory].tolist()))
+
+    source_country = instance.factory_country[factory]
+    target_country = instance.child_country[child]
+    num_countries = len(instance.country_ids)
+    child_edges = _group(child, len(instance.child_ids))
+    factory_edges = _group(factory, len(instance.factory_ids))
+    export_edges = _group(np.maximum(source_country, 0), num_countries,
+                          (source_country != target_country) & (source_country >= 0))
+    delivery_edges = _group(np.maximum(target_country, 0), num_countries, target_country >= 0)
+    return edges, child_edges, factory_edges, export_edges, delivery_edges
+
+
+def parse_input(input_data):
+    # An Instance passes through, binary instances are read (mostly in place) and text is bulk parsed;
+    # str input (tests, the daemon) is encoded first
+    if isinstance(input_data, Instance):
+        return input_data
+    if isinstance(input_data, str):
+        input_data = input_data.encode()
+    if is_binary(input_data):
+        return instance_from_buffer(input_data)
+    return read_instance(input_data)
+
+
+def report_relaxation(lp_time, outcome, mip_time=None):
+    # Timings of the --relax paths go to stderr so stdout keeps the single answer
+    report = f"relax: LP {lp_time:.3f}s ({outcome})"
+    if mip_time is not None:
+        report += f", MIP fallback {mip_time:.3f}s"
+    print(report, file=sys.stderr)
+
+
+def report_anytime(seconds_left, incumbent, bound):
+    # Progress of a --time-limit search, on stderr like the --relax timings
+    report = f"anytime: {max(seconds_left, 0):.1f}s left"
+    report += f", incumbent {incumbent:g}" if math.isfinite(incumbent) else ", no solution yet"
+    report += f", bound {bound:g}" if math.isfinite(bound) else ""
+    if math.isfinite(incumbent) and math.isfinite(bound):
+        report += f", gap {(bound - incumbent) / max(abs(bound), 1):.1%}"
+    print(report, file=sys.stderr)
+
+
+def build_pulp_model(pulp, instance, relax=False):
+    """PuLP model of a presolved instance: (model, variable per request edge, edge keys)."""
+    LpProblem, LpVariable, lpSum = pulp.LpProblem, pulp.LpVariable, pulp.lpSum
+
+    # Index request edges in a single pass so every constraint is built from its own edge list
+    edges, child_edges, factory_edges, export_edges, delivery_edges = build_edge_indexes(instance)
 
     # Problem Setup
-    model = LpProblem(name="gift_distribution", sense=LpMaximize)
+    model = LpProblem(name="gift_distribution", sense=pulp.LpMaximize)
 
     # Decision Variables
-    x = LpVariable.dicts("assign",
-                         [(child["id"], factory_id) for child in children for factory_id in child["requests"]
-                          if factory_id in factories],
-                         cat='Binary')
+    # Aggregated buckets stand for "count" children, so their variables go up to that count
+    child_count = instance.child_count.tolist()
+    x = [LpVariable(f"assign_{child_id}_{factory_id}", 0, child_count[child], 'Continuous' if relax else 'Integer')
+         for (child_id, factory_id), child in zip(edges, edge_children(instance).tolist())]
 
     # Objective Function: Maximize number of satisfied children
-    model += lpSum(x[child["id"], factory_id] for child in children for factory_id in child["requests"]
-                   if factory_id in factories)
+    model += lpSum(x)
 
     # Constraints
     # Each child gets at most one gift
-    for child in children:
-        model += lpSum(x[child["id"], factory_id] for factory_id in child["requests"] if factory_id in factories) <= 1
+    for child, edge_list in enumerate(child_edges):
+        model += lpSum(x[edge] for edge in edge_list) <= child_count[child]
 
-    # Factory stock constraints
-    for factory_id, factory in factories.items():
-        model += lpSum(x[child["id"], factory_id] for child in children if factory_id in child["requests"]) <= factory["stock"]
+    # Factory stock constraints (presolve leaves NO_LIMIT where the stock can never bind)
+    for stock, edge_list in zip(instance.factory_stock.tolist(), factory_edges):
+        if stock != NO_LIMIT:
+            model += lpSum(x[edge] for edge in edge_list) <= stock
 
     # Country export and delivery constraints
-    for country_id, country in countries.items():
+    for country, (max_export, min_delivery) in enumerate(zip(instance.country_pmax.tolist(),
+                                                             instance.country_pmin.tolist())):
         # Maximum exports
-        model += lpSum(x[child["id"], factory_id] for child in children for factory_id in child["requests"]
-                       if factory_id in factories and factories[factory_id]["country_id"] == country_id and child["country_id"] != country_id) <= country["max_export"]
+        if max_export != NO_LIMIT:
+            model += lpSum(x[edge] for edge in export_edges[country]) <= max_export
         # Minimum deliveries
-        model += lpSum(x[child["id"], factory_id] for child in children for factory_id in child["requests"]
-                       if factory_id in factories and child["country_id"] == country_id) >= country["min_delivery"]
+        if min_delivery > 0:
+            model += lpSum(x[edge] for edge in delivery_edges[country]) >= min_delivery
+    return model, x, edges
+
+
+def extract_pulp_solution(pulp, model, x, edges, assignment=None):
+    """Objective of a solved PuLP model, or -1; fills assignment with the toys per edge key."""
+    if model.status != 1:
+        return -1
+    if assignment is not None:
+        assignment.update({edge: int(round(var.varValue)) for edge, var in zip(edges, x) if (var.varValue or 0) > 0.5})
+    return int(round(pulp.value(model.objective) or 0))
+
+
+def greedy_start(instance):
+    """Greedy (child id, factory id) -> toys to warm-start a MIP with, or None if it misses a pmin."""
+    objective, assignment, feasible = load("greedy").greedy_assignment(instance)
+    print(f"warm start: greedy serves {objective}" if feasible else "warm start: greedy misses a minimum, not used",
+          file=sys.stderr)
+    return assignment if feasible else None
+
+
+def solve_ilp(instance, solver="glpk", relax=False, assignment=None, warm_start=False, phases=None):
+    """Solve the presolved instance as an ILP, returning the objective or -1 when infeasible.
+
+    With relax the LP relaxation is solved first with the simplex method, which returns a
+    vertex. The request/stock/export/delivery matrix is very close to a network matrix, so
+    that vertex is usually integral and branch-and-bound can be skipped; the MIP is only
+    solved when it is not. When assignment is a dict it receives the toys per (child, factory).
+    With warm_start a greedy solution is handed to the MIP as its first incumbent (CBC and
+    HiGHS only; the other backends solve without it). When phases is a dict the build, solve
+    and extract times are added to it.
+    """
+    phases = {} if phases is None else phases
+    mark = perf_counter()
+    start_solution = greedy_start(instance) if warm_start and solver in ("cbc", "highs") else None
+    if solver == "highs":
+        # In-process HiGHS on the CSR model, without an LP file round-trip
+        lap_phase(phases, "build", mark)
+        return load("highs_backend").solve_highs(instance, relax=relax, assignment=assignment, start=start_solution,
+                                                 phases=phases)
+    pulp = load("pulp")
+    model, x, edges = build_pulp_model(pulp, instance, relax)
+    if start_solution is not None:
+        for edge, var in zip(edges, x):
+            var.setInitialValue(start_solution.get(edge, 0))
+    command = pulp_solver(pulp, solver, warm_start=start_solution is not None)
+    mark = lap_phase(phases, "build", mark)
 
     # Solve the problem
-    model.solve(GLPK_CMD(msg=0))
+    start = perf_counter()
+    model.solve(command)
+
+    if relax:
+        lp_time = perf_counter() - start
+        if model.status == -1:
+            # An infeasible relaxation proves the ILP infeasible as well
+            lap_phase(phases, "solve", mark)
+            report_relaxation(lp_time, "infeasible")
+            return -1
+        if model.status == 1 and all(abs(var.varValue - round(var.varValue)) <= 1e-6 for var in x):
+            report_relaxation(lp_time, "integral")
+        else:
+            for var in x:
+                var.cat = pulp.LpInteger
+            start = perf_counter()
+            model.solve(command)
+            report_relaxation(lp_time, "fractional", perf_counter() - start)
+    mark = lap_phase(phases, "solve", mark)
+    result = extract_pulp_solution(pulp, model, x, edges, assignment)
+    lap_phase(phases, "extract", mark)
+    return result
+
+
+def solve_reduced(instance, engine="ilp", solver="glpk", relax=False, want_assignment=False, deadline=None,
+                  warm_start=False):
+    """Solve one presolved (sub-)instance with the chosen engine; returns (objective, assignment, phases).
+
+    phases holds the build, solve and extract times of the part, so pool workers can send them
+    back. The greedy engine answers with its own, possibly suboptimal, solution whenever it meets
+    every pmin; like the flow engine when it is not exact, it falls back to the ILP otherwise.
+    With a deadline the ILP is solved by HiGHS in anytime mode and the upper bound it proved is
+    returned as a fourth value; a greedy answer comes with the relaxed max-flow bound of
+    flow_bounds() instead (math.inf when the flow network cannot model the instance).
+    """
+    assignment = {} if want_assignment else None
+    phases = {}
+    mark = perf_counter()
+    result = None
+    if engine == "greedy":
+        objective, solution, feasible = load("greedy").greedy_assignment(instance)
+        if feasible and deadline is None:
+            lap_phase(phases, "solve", mark)
+            return objective, solution, phases
+        if feasible:
+            flow_engine = load("flow_engine")
+            try:
+                bound = max(flow_engine.flow_bounds(instance)[1], objective)
+            except flow_engine.NonNetworkInstance:
+                bound = math.inf
+            lap_phase(phases, "solve", mark)
+            return objective, solution, phases, bound
+        print("greedy engine misses a country minimum here, falling back to ILP", file=sys.stderr)
+    if engine == "flow":
+        flow_engine = load("flow_engine")
+        try:
+            result = flow_engine.solve_flow(instance, assignment=assignment)
+        except flow_engine.NonNetworkInstance as error:
+            print(f"flow engine not exact here ({error}), falling back to ILP", file=sys.stderr)
+    if engine != "ilp":
+        # A greedy or flow attempt that did not answer is solver time as well
+        mark = lap_phase(phases, "solve", mark)
+
+    if result is None and deadline is not None:
+        result, bound = load("highs_backend").solve_anytime(instance, deadline, assignment=assignment)
+        lap_phase(phases, "solve", mark)
+        return result, assignment or {}, phases, bound
+    if result is None:
+        result = solve_ilp(instance, solver=solver, relax=relax, assignment=assignment, warm_start=warm_start,
+                           phases=phases)
+    return (result, assignment or {}, phases) if deadline is None else (result, assignment or {}, phases, result)
+
+
+def lap_phase(phases, name, start):
+    """Charge the time since start to phases[name] and return the new start."""
+    now = perf_counter()
+    phases[name] = phases.get(name, 0.0) + now - start
+    return now
+
+
+def write_metrics(stats, path="-"):
+    """One JSON line of counters: to stderr for "-", else appended to the file at path."""
+    line = json.dumps(stats, separators=(",", ":"))
+    if path == "-":
+        print(line, file=sys.stderr)
+    else:
+        with open(path, "a") as handle:
+            handle.write(line + "\n")
+
+
+def solve_instance(instance, engine="ilp", solver="glpk", relax=False, feasibility_only=False,
+                   aggregate=True, show_assignment=False, jobs=1, time_limit=None, warm_start=False, stats=None):
+    """(objective, served) for a parsed instance, with objective -1 when it is infeasible.
+
+    served maps child id -> factory id when show_assignment is set, None otherwise. With
+    feasibility_only the objective is None when the circulation check alone proves feasibility.
+    When stats is a dict it receives the presolve reductions, the size of the model that was
+    solved and the time of each phase, both summed over components. With time_limit (seconds)
+    the objective is the best one found by then and stats also gets the proven upper bound.
+    """
+    measure = stats is not None
+    stats = {} if stats is None else stats
+    phases = stats.setdefault("phases", {})
+    mark = perf_counter()
+    deadline = None if time_limit is None else time() + time_limit
+    reduced = presolve(instance)
+    instance = reduced.instance
+    stats["reductions"] = reduced.reductions
+
+    # Cheap per-country bounds catch most infeasible instances before any model is built
+    infeasible = reduced.infeasible or precheck(instance) is not None
+    mark = lap_phase(phases, "presolve", mark)
+    if infeasible:
+        return -1, None
+
+    if feasibility_only:
+        from feasibility import check_feasibility
+        feasible = check_feasibility(instance)
+        mark = lap_phase(phases, "feasibility", mark)
+        if feasible is not None:
+            return (None if feasible else -1), None
+        print("circulation inconclusive under joint export caps, solving the ILP", file=sys.stderr)
+
+    # Interchangeable children become one bucket with a count; the greedy engine walks every
+    # request once anyway, so it would spend more on bucketing than it saves
+    members = None
+    if aggregate and engine != "greedy":
+        instance, members = aggregate_children(instance)
+
+    # Disjoint clusters of countries are solved separately and their objectives added
+    parts = split_components(instance)
+    lap_phase(phases, "aggregate", mark)
+    if measure:
+        sizes = np.array([load("csr_model").model_size(part) for part in parts], dtype=np.int64).reshape(-1, 3)
+        stats["model"] = dict(zip(["variables", "constraints", "nonzeros"], sizes.sum(axis=0).tolist()),
+                              components=len(parts), buckets=len(instance.child_ids))
+    solve = partial(solve_reduced, engine=engine, solver=solver, relax=relax, want_assignment=show_assignment,
+                    deadline=deadline, warm_start=warm_start)
+    bounds = None if deadline is None else []
+    # build, solve and extract are summed over the parts, so under the pool they can add up to
+    # more than the wall time
+    result, assignment = solve_components(parts, solve, jobs=jobs, bounds=bounds, phases=phases)
+    if result == -1:
+        return -1, None
+    if bounds is not None:
+        # A greedy answer is never called optimal: its bound comes from a relaxation, not a search
+        objective, bound = result + len(reduced.fixed), sum(bounds) + len(reduced.fixed)
+        stats["bound"] = bound if math.isfinite(bound) else None
+        report = f"anytime: objective {objective}"
+        if math.isfinite(bound):
+            report += f", bound {bound:g}, gap {(bound - objective) / max(bound, 1):.1%}"
+            report += " (optimal)" if bound == objective and engine != "greedy" else ""
+        else:
+            report += ", no finite bound"
+        print(report, file=sys.stderr)
+
+    # Count the assignments presolve already fixed
+    served = None
+    if show_assignment:
+        served = expand_assignment(members, assignment)
+        served.update(reduced.fixed)
+    return result + len(reduced.fixed), served
+
+
+def solve_toy_distribution(input_data, engine="ilp", solver="glpk", relax=False, feasibility_only=False,
+                           aggregate=True, show_assignment=False, jobs=1, cache=None, time_limit=None,
+                           warm_start=False, stats=None):
+    # stats, when a dict, is filled with the counters described in solve_instance plus the
+    # input size, parse and cache times, the cache outcome and the result
+    started = perf_counter()
+    phases = stats.setdefault("phases", {}) if stats is not None else {}
+    instance = parse_input(input_data)
+    log_memory(instance)
+    mark = lap_phase(phases, "parse", started)
+
+    # Instances seen before (up to relabelling) are answered from the on-disk cache at path cache
+    hit = None
+    if cache:
+        result_cache = load("result_cache")
+        cache, canonical = result_cache.open_cache(cache), result_cache.canonicalize(instance)
+        hit = cache.get(instance, canonical, need_assignment=show_assignment)
+        lap_phase(phases, "cache", mark)
+    objective, served = hit or solve_instance(instance, engine=engine, solver=solver, relax=relax,
+                                              feasibility_only=feasibility_only, aggregate=aggregate,
+                                              show_assignment=show_assignment, jobs=jobs, time_limit=time_limit,
+                                              warm_start=warm_start, stats=stats)
+    # Budgeted and greedy runs may end short of the optimum, so only their cache hits are used
+    if cache and hit is None and objective is not None and time_limit is None and engine != "greedy":
+        cache.put(instance, canonical, objective, served)
+
+    if stats is not None:
+        stats.update(factories=len(instance.factory_ids), countries=len(instance.country_ids),
+                     children=len(instance.child_ids), requests=len(instance.request_factory),
+                     result=objective, cache=None if not cache else "hit" if hit else "miss")
+        phases["total"] = perf_counter() - started
 
     # Output the result
-    print(int(value(model.objective)) if model.status == 1 else -1)
+    if feasibility_only:
+        print(-1 if objective == -1 else 1)
+        return
+    print(objective)
+    if show_assignment and objective != -1:
+        for child_id in sorted(served):
+            print(child_id, served[child_id])
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Toy distribution solver (reads a text or binary instance from stdin)")
+    parser.add_argument("--engine", choices=["ilp", "flow", "greedy"], default="ilp",
+                        help="ilp: PuLP model; flow: max-flow with lower bounds (ILP fallback when not a network); "
+                             "greedy: fast approximate answer (ILP fallback when it misses a country minimum)")
+    parser.add_argument("--solver", choices=["glpk", "cbc", "highs", "portfolio"], default="glpk",
+                        help="ILP backend: GLPK_CMD or PULP_CBC_CMD subprocesses, in-process HiGHS, or a "
+                             "portfolio racing all of them as subprocesses and keeping the first proven result")
+    parser.add_argument("--relax", action="store_true",
+                        help="solve the LP relaxation by simplex first; fall back to the MIP only if it is fractional")
+    parser.add_argument("--feasibility-only", action="store_true",
+                        help="print 1 if the instance is feasible and -1 otherwise, from a single circulation check")
+    parser.add_argument("--warm-start", action="store_true",
+                        help="start the MIP from a greedy solution (CBC and in-process HiGHS)")
+    parser.add_argument("--aggregate", action=argparse.BooleanOptionalAction, default=True,
+                        help="merge children with the same country and requests into integer buckets")
+    parser.add_argument("--assignment", action="store_true",
+                        help="after the answer, print one 'child factory' line per child that gets a toy")
+    parser.add_argument("--jobs", type=int, default=0,
+                        help="processes for solving independent components in parallel (0: all cores)")
+    parser.add_argument("--cache", nargs="?", const=RESULT_CACHE, metavar="PATH",
+                        help=f"reuse results of identical instances from an on-disk cache (default path: {RESULT_CACHE})")
+    parser.add_argument("--metrics", nargs="?", const="-", metavar="PATH",
+                        help="write model size, presolve reductions and phase times as a JSON line "
+                             "to stderr, or append it to PATH")
+    parser.add_argument("--time-limit", type=float, metavar="SECONDS",
+                        help="anytime mode: search with in-process HiGHS for SECONDS, then answer with the best "
+                             "solution found; progress, the proven bound and the gap go to stderr. The search "
+                             "only runs past the limit while it has no solution at all")
+    parser.add_argument("--startup-report", action="store_true",
+                        help="print the time spent importing each lazily loaded module to stderr")
+    parser.add_argument("--verbose", action="store_true", help="log presolve reductions to stderr")
+    args = parser.parse_args()
+    if args.verbose:
+        logging.basicConfig(level=logging.INFO, format="%(message)s")
+
     # Read input from standard input
-    input_data = sys.stdin.read()
-    solve_toy_distribution(input_data)
+    input_data = sys.stdin.buffer.read()
+    stats = {} if args.metrics else None
+    solve_toy_distribution(input_data, engine=args.engine, solver=args.solver, relax=args.relax,
+                           feasibility_only=args.feasibility_only, aggregate=args.aggregate,
+                           show_assignment=args.assignment, jobs=args.jobs, cache=args.cache,
+                           time_limit=args.time_limit, warm_start=args.warm_start, stats=stats)
+    if args.metrics:
+        write_metrics(stats, args.metrics)
+    if args.startup_report:
+        startup_report(STARTED)
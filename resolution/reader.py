@@ -0,0 +1,56 @@
+import numpy as np
+
+from instance import build_instance
+
+
+def tokenize(buffer):
+    """All integers of an instance, plus how many sit on each non-empty line.
+
+    NumPy's C text parser reads the values; byte masks only find where tokens start, to count
+    them per line. Temporaries are one byte per input byte or one index per token or line.
+    """
+    data = np.frombuffer(buffer, dtype=np.uint8)
+    # Unsigned bytes below the range start wrap around, so one compare tests each range
+    digit = (data - np.uint8(ord("0"))) < 10
+    invalid = ~(digit | (data == ord(" ")) | ((data - np.uint8(ord("\t"))) < 5))  # \t \n \v \f \r
+    if invalid.any():
+        bad = int(np.argmax(invalid))
+        raise ValueError(f"unexpected byte {buffer[bad:bad + 1]!r} at offset {bad}")
+
+    # fromstring reads a lone 0 from input that is all whitespace
+    starts = np.flatnonzero(digit & ~np.append(False, digit[:-1]))
+    values = np.fromstring(buffer, dtype=np.int64, sep=" ") if len(starts) else np.zeros(0, dtype=np.int64)
+
+    # Tokens per non-empty line: the token starts before each line end, differenced
+    line_ends = np.append(np.flatnonzero(data == ord("\n")), len(data))
+    per_line = np.diff(np.searchsorted(starts, line_ends), prepend=0)
+    return values, per_line[per_line > 0]
+
+
+def read_instance(buffer):
+    """Parse an instance from bytes into an Instance.
+
+    The header is either "n m" (generate_inputs.py) or "n m t" (test_generator.py), told
+    apart by its length; with "n m" every line after the countries is a child. Factory and
+    country records are sliced out of the flat integer array by offset.
+    """
+    values, counts = tokenize(buffer)
+    if not len(counts) or counts[0] not in (2, 3):
+        raise ValueError("the header must be 'n m' or 'n m t'")
+    n, m = int(values[0]), int(values[1])
+    t = int(values[2]) if counts[0] == 3 else len(counts) - 1 - n - m
+    child_counts = counts[1 + n + m:1 + n + m + t]
+    if (len(counts) < 1 + n + m + t or np.any(counts[1:1 + n + m] != 3) or np.any(child_counts < 2)):
+        raise ValueError(f"expected {n} factory and {m} country lines of 3 integers and {t} children")
+
+    start = int(counts[0])
+    factory_rows = values[start:start + 3 * n]
+    country_rows = values[start + 3 * n:start + 3 * (n + m)]
+
+    # Children: the first two integers of each line are id and country, the rest requests
+    section = values[start + 3 * (n + m):start + 3 * (n + m) + int(child_counts.sum())]
+    line_start = np.cumsum(child_counts) - child_counts
+    header = np.zeros(len(section), dtype=bool)
+    header[line_start] = header[line_start + 1] = True
+    return build_instance(factory_rows, country_rows, section[line_start], section[line_start + 1],
+                          child_counts - 2, section[~header])
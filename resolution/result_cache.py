@@ -0,0 +1,172 @@
+import argparse
+import hashlib
+import logging
+import os
+import sqlite3
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from startup import RESULT_CACHE
+
+log = logging.getLogger("cache")
+
+DEFAULT_MAX_BYTES = 256 << 20
+# Bumped whenever the canonical form changes, so old keys can never match
+FORMAT = b"toy-cache-1"
+ROW_OVERHEAD = 64
+
+# key is the hex digest of the canonical instance; child_order and factory_order list the
+# original positions in canonical order, to translate assignments both ways
+Canonical = namedtuple("Canonical", ["key", "child_order", "factory_order"])
+
+
+def canonicalize(instance):
+    """Canonical form of an instance: ids renumbered, requests sorted, entities in content order.
+
+    Countries are ordered by (pmax, pmin, factories, total stock, children), factories by
+    (country, stock, requests, domestic requests) and children by (country, sorted requests),
+    with ties kept in input order. Relabelled or reordered copies of an instance therefore share a key unless
+    they contain ties the ordering cannot break; the key always encodes the whole instance, so
+    equal keys mean equal problems.
+    """
+    num_countries = len(instance.country_ids)
+    factory_country, child_country = instance.factory_country, instance.child_country
+    listed_factories, listed_children = factory_country >= 0, child_country >= 0
+    country_order = np.lexsort((
+        np.bincount(child_country[listed_children], minlength=num_countries),
+        np.bincount(factory_country[listed_factories], weights=instance.factory_stock[listed_factories],
+                    minlength=num_countries),
+        np.bincount(factory_country[listed_factories], minlength=num_countries),
+        instance.country_pmin, instance.country_pmax))
+    country_rank = np.empty(num_countries + 1, dtype=np.int64)
+    country_rank[country_order] = np.arange(num_countries)
+    country_rank[-1] = -1  # unlisted countries stay -1
+
+    # Requests from the factory's own country help break ties between similar factories
+    num_factories = len(instance.factory_ids)
+    degree = np.diff(instance.factory_ptr)
+    edge_factory = np.repeat(np.arange(num_factories), degree)
+    same_country = child_country[instance.factory_child] == factory_country[edge_factory]
+    domestic = np.bincount(edge_factory, weights=same_country, minlength=num_factories)
+    factory_order = np.lexsort((domestic, degree, instance.factory_stock, country_rank[factory_country]))
+    factory_rank = np.empty(len(factory_order), dtype=np.int64)
+    factory_rank[factory_order] = np.arange(len(factory_order))
+
+    # Children sorted by content; identical children are interchangeable, so ties do not matter
+    ranks = factory_rank[instance.request_factory].tolist()
+    ptr = instance.request_ptr.tolist()
+    countries, counts = country_rank[child_country].tolist(), instance.child_count.tolist()
+    rows = [(countries[child], counts[child], sorted(ranks[ptr[child]:ptr[child + 1]]))
+            for child in range(len(countries))]
+    child_order = sorted(range(len(rows)), key=rows.__getitem__)
+
+    digest = hashlib.sha256(FORMAT)
+    for array in (instance.country_pmax[country_order], instance.country_pmin[country_order],
+                  country_rank[factory_country[factory_order]], instance.factory_stock[factory_order]):
+        digest.update(np.ascontiguousarray(array, dtype="<i8").tobytes())
+        digest.update(b"|")
+    for child in child_order:
+        country, count, requests = rows[child]
+        digest.update(np.array([country, count, len(requests), *requests], dtype="<i8").tobytes())
+    return Canonical(digest.hexdigest(), np.array(child_order, dtype=np.int64), factory_order)
+
+
+class ResultCache:
+    """Objectives (and assignments) of solved instances in SQLite, evicted least recently used.
+
+    Entries are keyed by canonicalize(instance).key; once the stored entries exceed max_bytes
+    the least recently used ones are dropped. Hits and misses are counted in the database.
+    """
+
+    def __init__(self, path=RESULT_CACHE, max_bytes=DEFAULT_MAX_BYTES):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.max_bytes = max_bytes
+        self.db = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS results (
+                key TEXT PRIMARY KEY, objective INTEGER NOT NULL, assignment BLOB,
+                size INTEGER NOT NULL, used REAL NOT NULL);
+            CREATE INDEX IF NOT EXISTS results_used ON results (used);
+            CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+            INSERT OR IGNORE INTO stats VALUES ('hits', 0), ('misses', 0);
+        """)
+
+    def get(self, instance, canonical, need_assignment=False):
+        """(objective, served child id -> factory id or None) on a hit, None on a miss."""
+        row = self.db.execute("SELECT objective, assignment FROM results WHERE key = ?",
+                              (canonical.key,)).fetchone()
+        if row is None or (need_assignment and row[0] != -1 and row[1] is None):
+            self.db.execute("UPDATE stats SET value = value + 1 WHERE name = 'misses'")
+            log.info("cache: miss %s", canonical.key[:16])
+            return None
+        self.db.execute("UPDATE results SET used = ? WHERE key = ?", (time.time(), canonical.key))
+        self.db.execute("UPDATE stats SET value = value + 1 WHERE name = 'hits'")
+        log.info("cache: hit %s", canonical.key[:16])
+
+        objective, blob = row
+        if blob is None:
+            return objective, None
+        pairs = np.frombuffer(blob, dtype="<i4").reshape(-1, 2)
+        children = instance.child_ids[canonical.child_order[pairs[:, 0]]].tolist()
+        factories = instance.factory_ids[canonical.factory_order[pairs[:, 1]]].tolist()
+        return objective, dict(zip(children, factories))
+
+    def put(self, instance, canonical, objective, served=None):
+        """Store an objective and optionally the served map, then evict down to max_bytes."""
+        blob = None
+        if served is not None:
+            child_rank = np.empty(len(canonical.child_order), dtype=np.int64)
+            child_rank[canonical.child_order] = np.arange(len(child_rank))
+            factory_rank = np.empty(len(canonical.factory_order), dtype=np.int64)
+            factory_rank[canonical.factory_order] = np.arange(len(factory_rank))
+            # Ids back to positions through the sorted id arrays
+            child_sort, factory_sort = np.argsort(instance.child_ids), np.argsort(instance.factory_ids)
+            child_ids = np.fromiter(served, dtype=np.int64, count=len(served))
+            factory_ids = np.fromiter(served.values(), dtype=np.int64, count=len(served))
+            children = child_sort[np.searchsorted(instance.child_ids, child_ids, sorter=child_sort)]
+            factories = factory_sort[np.searchsorted(instance.factory_ids, factory_ids, sorter=factory_sort)]
+            pairs = np.column_stack([child_rank[children], factory_rank[factories]])
+            blob = pairs[np.argsort(pairs[:, 0])].astype("<i4").tobytes()
+        size = ROW_OVERHEAD + (len(blob) if blob else 0)
+        self.db.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)",
+                        (canonical.key, objective, blob, size, time.time()))
+        self.db.execute("""
+            DELETE FROM results WHERE key IN (
+                SELECT key FROM (SELECT key, SUM(size) OVER (ORDER BY used DESC) AS total FROM results)
+                WHERE total > ?)""", (self.max_bytes,))
+
+    def stats(self):
+        hits, misses = (self.db.execute("SELECT value FROM stats WHERE name = ?", (name,)).fetchone()[0]
+                        for name in ("hits", "misses"))
+        entries, size = self.db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+        return {"entries": entries, "bytes": size, "hits": hits, "misses": misses,
+                "hit_rate": hits / (hits + misses) if hits + misses else 0.0}
+
+    def clear(self):
+        self.db.executescript("DELETE FROM results; UPDATE stats SET value = 0;")
+
+
+_open = {}
+
+
+def open_cache(path=RESULT_CACHE):
+    # One connection per process and path, reused by warm workers
+    if path not in _open:
+        _open[path] = ResultCache(path)
+    return _open[path]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect the on-disk result cache")
+    parser.add_argument("command", choices=["stats", "clear"])
+    parser.add_argument("--path", default=RESULT_CACHE)
+    args = parser.parse_args()
+
+    cache = open_cache(args.path)
+    if args.command == "clear":
+        cache.clear()
+    stats = cache.stats()
+    print(f"{stats['entries']} entries, {stats['bytes']} bytes, {stats['hits']} hits, "
+          f"{stats['misses']} misses ({stats['hit_rate']:.1%} hit rate)")
@@ -0,0 +1,38 @@
+import argparse
+import json
+import socket
+import sys
+
+# Kept free of solver imports so a call costs little more than the interpreter start-up
+DEFAULT_SOCKET = "/tmp/proj23.sock"
+
+
+def request(input_data, path=DEFAULT_SOCKET, **options):
+    """Send an instance (bytes) to the solver daemon and return its reply text."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+        conn.connect(path)
+        conn.sendall(json.dumps(options).encode() + b"\n" + input_data)
+        conn.shutdown(socket.SHUT_WR)
+        chunks = []
+        while chunk := conn.recv(65536):
+            chunks.append(chunk)
+    return b"".join(chunks).decode()
+
+
+if __name__ == "__main__":
+    # Stands in for `python3 proj23.py < file`
+    parser = argparse.ArgumentParser(description="Solve an instance from stdin on the running solver daemon")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET)
+    parser.add_argument("--engine", choices=["ilp", "flow", "greedy"])
+    parser.add_argument("--solver", choices=["glpk", "cbc", "highs", "portfolio"])
+    parser.add_argument("--relax", action="store_true", default=None)
+    parser.add_argument("--assignment", action="store_true")
+    parser.add_argument("--timeout", type=float, help="override the daemon's per-request timeout")
+    args = parser.parse_args()
+
+    options = {key: value for key, value in vars(args).items() if key != "socket" and value is not None}
+    reply = request(sys.stdin.buffer.read(), args.socket, **options)
+    if reply.startswith("error:"):
+        print(reply.strip(), file=sys.stderr)
+        sys.exit(1)
+    sys.stdout.write(reply)
@@ -0,0 +1,117 @@
+import argparse
+import json
+import multiprocessing
+import os
+import queue
+import signal
+import socketserver
+import sys
+import threading
+
+from startup import RESULT_CACHE
+from warm_worker import WarmWorker, WorkerError
+
+DEFAULT_SOCKET = "/tmp/proj23.sock"
+SOLVE_OPTIONS = ("engine", "solver", "relax", "aggregate")
+
+
+def _solve_request(request):
+    # Runs in a worker process; the answer is what proj23 would print
+    import contextlib
+    import io
+
+    from proj23 import solve_toy_distribution
+
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        # A worker cannot fork its own component pool, so components run in turn
+        solve_toy_distribution(request["input"], show_assignment=request["assignment"], jobs=1,
+                               **request["options"])
+    return output.getvalue()
+
+
+class Job:
+    def __init__(self, request):
+        self.request = request
+        self.done = threading.Event()
+        self.response = None
+
+
+def _dispatch(worker, jobs, timeout):
+    while True:
+        job = jobs.get()
+        try:
+            job.response = worker.call(job.request, job.request.get("timeout") or timeout)
+        except WorkerError as error:
+            job.response = f"error: {error}\n"
+        job.done.set()
+
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    # Request: one JSON line of options, then the instance text until the client shuts down writing
+
+    def handle(self):
+        header = json.loads(self.rfile.readline() or "{}")
+        request = {"input": self.rfile.read(),
+                   "assignment": bool(header.get("assignment")),
+                   "timeout": header.get("timeout"),
+                   "options": {**self.server.defaults,
+                               **{key: header[key] for key in SOLVE_OPTIONS if key in header}}}
+        job = Job(request)
+        try:
+            self.server.jobs.put_nowait(job)
+        except queue.Full:
+            self.wfile.write(b"error: queue full\n")
+            return
+        job.done.wait()
+        self.wfile.write(job.response.encode())
+
+
+class SolverServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def serve(path, workers, queue_size, timeout, defaults):
+    """Serve instances on a UNIX socket with workers warm solver processes.
+
+    Requests wait in a queue of at most queue_size entries; when it is full the client gets
+    "error: queue full" straight away. A request running longer than timeout seconds gets
+    "error: timeout ..." and its worker process is replaced.
+    """
+    context = multiprocessing.get_context("spawn")
+    jobs = queue.Queue(maxsize=queue_size)
+    for _ in range(workers):
+        worker = WarmWorker(context, _solve_request, defaults["engine"], defaults["solver"])
+        threading.Thread(target=_dispatch, args=(worker, jobs, timeout), daemon=True).start()
+
+    if os.path.exists(path):
+        os.unlink(path)
+    with SolverServer(path, RequestHandler) as server:
+        server.jobs = jobs
+        server.defaults = defaults
+        print(f"solver daemon: {workers} workers on {path}", file=sys.stderr)
+        # Leave through the finally below on SIGTERM too, so the socket file is removed
+        signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            os.unlink(path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Long-lived toy distribution solver on a UNIX socket")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET, help=f"socket path (default {DEFAULT_SOCKET})")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="solver processes")
+    parser.add_argument("--queue", type=int, default=64, help="requests allowed to wait for a worker")
+    parser.add_argument("--timeout", type=float, default=60, help="seconds per request before its worker is killed")
+    parser.add_argument("--engine", choices=["ilp", "flow", "greedy"], default="ilp")
+    parser.add_argument("--solver", choices=["glpk", "cbc", "highs", "portfolio"], default="glpk")
+    parser.add_argument("--relax", action="store_true")
+    parser.add_argument("--cache", nargs="?", const=RESULT_CACHE, metavar="PATH",
+                        help="reuse results of identical instances from an on-disk cache")
+    args = parser.parse_args()
+
+    serve(args.socket, args.workers, args.queue, args.timeout,
+          {"engine": args.engine, "solver": args.solver, "relax": args.relax, "cache": args.cache})
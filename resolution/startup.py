@@ -0,0 +1,64 @@
+import importlib
+import json
+import os
+import sys
+from time import perf_counter
+
+# (module, seconds, modules it pulled in) for every import done through load()
+import_times = []
+
+CACHE_DIR = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "proj23")
+SOLVER_CACHE = os.path.join(CACHE_DIR, "solvers.json")
+RESULT_CACHE = os.path.join(CACHE_DIR, "results.sqlite")
+PORTFOLIO_LOG = os.path.join(CACHE_DIR, "portfolio.jsonl")
+
+
+def load(name):
+    """Import a module on first use, recording how long the import took."""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    before = len(sys.modules)
+    start = perf_counter()
+    module = importlib.import_module(name)
+    import_times.append((name, perf_counter() - start, len(sys.modules) - before))
+    return module
+
+
+def cached_solver_path(name, discover):
+    """Path of a solver binary, remembered between runs in SOLVER_CACHE.
+
+    discover() is only called when there is no entry for the current PATH or the cached
+    binary is gone; a solver that is not found is not cached, so installing it later works.
+    """
+    search_path = os.environ.get("PATH", "")
+    try:
+        with open(SOLVER_CACHE) as handle:
+            cache = json.load(handle)
+    except (OSError, ValueError):
+        cache = {}
+    entry = cache.get(name)
+    if entry and entry["PATH"] == search_path and os.access(entry["binary"], os.X_OK):
+        return entry["binary"]
+
+    binary = discover()
+    if binary:
+        cache[name] = {"PATH": search_path, "binary": binary}
+        try:
+            os.makedirs(os.path.dirname(SOLVER_CACHE), exist_ok=True)
+            with open(SOLVER_CACHE, "w") as handle:
+                json.dump(cache, handle)
+        except OSError:
+            pass  # a read-only home only costs the lookup next time
+    return binary
+
+
+def startup_report(started, file=sys.stderr):
+    """Print the import breakdown and total run time, like a coarse `python -X importtime`."""
+    total = perf_counter() - started
+    print("startup report (ms):", file=file)
+    for name, seconds, modules in import_times:
+        print(f"  import {name:<16} {seconds * 1000:8.1f}  ({modules} modules)", file=file)
+    imports = sum(seconds for _, seconds, _ in import_times)
+    print(f"  {'imports total':<23} {imports * 1000:8.1f}", file=file)
+    print(f"  {'run total':<23} {total * 1000:8.1f}  (interpreter start-up not included)", file=file)
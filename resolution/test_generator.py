@@ -1,18 +1,11 @@
+import argparse
+import io
 import random
-import sys
-
-# Generate a random integer using Gaussian distribution
-def generate_random_integer(c, x):
-    return int(round(random.gauss(c, x)))
-
-# Generate a unique request for a child
-def generate_request(requests, facts):
-    r = int(random.uniform(1, facts))
-    if requests.get(r) is None:
-        requests[r] = True
-        return r
-    else:
-        return generate_request(requests, facts)
+
+import numpy as np
+
+# Numbers formatted per chunk of child lines; bounds the generator's memory use
+TOKENS_PER_CHUNK = 1 << 19
 
 # Generate random parameters for testing
 def generate_parameters():
@@ -36,82 +29,127 @@ def determine_test_type(num_factories, num_countries, num_children):
     else:
         return "Edge Case"
 
-# Generate and save a random test case
-def generate_random_test_case():
-    num_factories, num_countries, num_children, variance, max_cap, max_requests = generate_parameters()
-
-    fs_per_country = []
-    cs_per_country = []
-
-    avg_fs_per_country = int(num_factories / num_countries)
-    avg_cs_per_country = int(num_children / num_countries)
-
-    total_fs = 0
-    total_cs = 0
-
-    factories_data = {}
-    countries_data = {}
-    children_data = {}
-
-    countries_info = []
-    cur_fact = 1
-    cur_child = 1
+# ASCII of non-negative integers, each followed by a space or (where line_ends) a newline
+def encode_tokens(tokens, line_ends):
+    tokens = np.asarray(tokens, dtype=np.int64)
+    if not len(tokens):
+        return b""
+    width = len(str(int(tokens.max())))
+    chars = np.empty((len(tokens), width + 1), dtype=np.uint8)
+    # Peel digits off the right; 32-bit division is faster when the values fit
+    rest = tokens.astype(np.int32 if width < 10 else np.int64)
+    for column in range(width - 1, -1, -1):
+        chars[:, column] = rest % 10
+        rest //= 10
+    chars[:, :width] += ord("0")
+    chars[:, width] = np.where(line_ends, ord("\n"), ord(" "))
+    # Drop the leading zeros: a number with d digits keeps its last d columns
+    digits = 1 + np.searchsorted(10 ** np.arange(1, width, dtype=np.int64), tokens, side="right")
+    keep = np.arange(width + 1) >= (width - digits)[:, None]
+    return chars[keep].tobytes()
+
+# Encode a table of rows with a variable number of values (row i has lengths[i] values)
+def encode_rows(table, lengths):
+    keep = np.arange(table.shape[1]) < np.asarray(lengths)[:, None]
+    line_ends = np.zeros(table.shape, dtype=bool)
+    line_ends[np.arange(len(table)), np.asarray(lengths) - 1] = True
+    return encode_tokens(table[keep], line_ends[keep])
+
+# Split total into per-country counts drawn from a Gaussian around the average; the last
+# country takes what is left, as do earlier ones once the draws run past the total
+def split_counts(rng, total, num_countries, variance):
+    average = int(total / num_countries)
+    draws = np.maximum(np.rint(rng.normal(average, average * variance, num_countries)), 0).astype(np.int64)
+    bounds = np.minimum(np.cumsum(draws), total)
+    bounds[-1] = total
+    return np.diff(bounds, prepend=0)
+
+# Distinct request sets for a chunk of children: row i holds counts[i] factories from 1..pool
+# in its first columns. Slots that repeat a factory are redrawn until every row is distinct,
+# which keeps each set uniform; when most of the pool is requested, random sort keys are cheaper.
+def sample_requests(rng, counts, pool):
+    width = int(counts.max())
+    if 2 * width >= pool:
+        keys = rng.random((len(counts), pool))
+        return np.argsort(keys, axis=1)[:, :width] + 1
+    picks = rng.integers(1, pool + 1, size=(len(counts), width))
+    while True:
+        order = np.argsort(picks, axis=1, kind="stable")
+        ordered = np.take_along_axis(picks, order, axis=1)
+        repeated = np.zeros(picks.shape, dtype=bool)
+        np.put_along_axis(repeated, order[:, 1:], ordered[:, 1:] == ordered[:, :-1], axis=1)
+        # Only repeats inside a row's first counts[i] columns matter
+        repeated &= np.arange(width) < counts[:, None]
+        if not repeated.any():
+            return picks
+        picks[repeated] = rng.integers(1, pool + 1, size=int(repeated.sum()))
+
+# Write a test case with the given parameters to a binary file object, child lines in chunks
+def write_test_case(out, num_factories, num_countries, num_children, variance, max_cap, max_requests, seed=None):
+    rng = np.random.default_rng(seed)
+    # A child requests int(uniform(1, max_requests)) factories among 1..num_factories - 1
+    if max(max_requests - 1, 1) >= num_factories:
+        raise ValueError("max_requests must stay below num_factories")
+
+    factory_counts = split_counts(rng, num_factories, num_countries, variance)
+    child_counts = split_counts(rng, num_children, num_countries, variance)
+    country_ids = np.arange(1, num_countries + 1)
+
+    # Factories: consecutive ids per country, capacity uniform in [1, max_cap)
+    caps = (1 + rng.random(num_factories) * (max_cap - 1)).astype(np.int64)
+    factory_country = np.repeat(country_ids, factory_counts)
+    total_caps = np.bincount(factory_country - 1, weights=caps, minlength=num_countries)
+
+    # Countries: export cap in [total / 4, total), minimum deliveries in [children / 4, children)
+    export_caps = (total_caps / 4 + rng.random(num_countries) * (total_caps - total_caps / 4)).astype(np.int64)
+    min_children = (child_counts / 4 + rng.random(num_countries) * (child_counts - child_counts / 4)).astype(np.int64)
+
+    out.write(f"{num_factories} {num_countries} {num_children}\n".encode())
+    out.write(encode_rows(np.column_stack([np.arange(1, num_factories + 1), factory_country, caps]),
+                          np.full(num_factories, 3)))
+    out.write(encode_rows(np.column_stack([country_ids, export_caps, min_children]), np.full(num_countries, 3)))
+
+    # Children: consecutive ids per country, streamed a chunk at a time
+    child_bounds = np.cumsum(child_counts)
+    chunk = max(1, TOKENS_PER_CHUNK // (max_requests + 2))
+    for start in range(0, num_children, chunk):
+        child_ids = np.arange(start + 1, min(start + chunk, num_children) + 1)
+        countries = np.searchsorted(child_bounds, child_ids - 1, side="right") + 1
+        counts = rng.integers(1, max(max_requests, 2), size=len(child_ids))
+        requests = sample_requests(rng, counts, num_factories - 1)
+        out.write(encode_rows(np.column_stack([child_ids, countries, requests]), counts + 2))
+
+# Build a test case with the given parameters in memory, as bytes
+def generate_test_case(num_factories, num_countries, num_children, variance, max_cap, max_requests, seed=None):
+    out = io.BytesIO()
+    write_test_case(out, num_factories, num_countries, num_children, variance, max_cap, max_requests, seed)
+    return out.getvalue()
 
-    for c in range(num_countries):
-        cur_fs = generate_random_integer(avg_fs_per_country, avg_fs_per_country * variance)
-        cur_cs = generate_random_integer(avg_cs_per_country, avg_cs_per_country * variance)
-
-        if (num_factories - total_fs < cur_fs or c == (num_countries - 1)):
-            cur_fs = num_factories - total_fs
-
-        if (num_children - total_cs < cur_cs or c == (num_countries - 1)):
-            cur_cs = num_children - total_cs
-
-        countries_info.append((cur_fs, cur_cs))
-        total_fs += cur_fs
-        total_cs += cur_cs
-
-        cur_total_cap = 0
-        for j in range(cur_fact, total_fs + 1):
-            cap = int(random.uniform(1, max_cap))
-            cur_total_cap += cap
-            factories_data[j] = (j, c + 1, cap)
-
-        country_export_cap = int(random.uniform(cur_total_cap / 4, cur_total_cap))
-        country_min_cs = int(random.uniform(cur_cs / 4, cur_cs))
-        countries_data[c + 1] = (c + 1, country_export_cap, country_min_cs)
-
-        for ch in range(cur_child, total_cs + 1):
-            requests_num = int(random.uniform(1, max_requests))
-            assert (requests_num < num_factories)
-            lst = [ch, c + 1]
-            requests = {}
-            for i in range(requests_num):
-                r = generate_request(requests, num_factories)
-                lst.append(r)
-            children_data[ch] = lst
+# Generate and save a random test case
+def generate_random_test_case(seed=None, path="testfile", parameters=None):
+    random.seed(seed)
+    num_factories, num_countries, num_children, variance, max_cap, max_requests = parameters or generate_parameters()
 
-        cur_fact = total_fs + 1
-        cur_child = total_cs + 1
+    with open(path, "wb") as f:
+        write_test_case(f, num_factories, num_countries, num_children, variance, max_cap, max_requests, seed)
 
     # Determine test type
     test_type = determine_test_type(num_factories, num_countries, num_children)
 
-    # Save the test case to a file
-    with open("testfile", "w") as f:
-        f.write(f"{num_factories} {num_countries} {num_children}\n")
-        for i in range(num_factories):
-            fi, pj, fmaxi = factories_data[i + 1]
-            f.write(f"{fi} {pj} {fmaxi}\n")
-        for i in range(num_countries):
-            pj, pmaxj, pminj = countries_data[i + 1]
-            f.write(f"{pj} {pmaxj} {pminj}\n")
-        for i in range(num_children):
-            c_data = children_data[i + 1]
-            f.write(" ".join(map(str, c_data)) + "\n")
-
     print(f"Test Type: {test_type}")
-    print("Test case saved to 'testfile'")
+    print(f"Test case saved to '{path}'")
 
 if __name__ == "__main__":
-    generate_random_test_case()
+    parser = argparse.ArgumentParser(description="Random test case with Gaussian per-country sizes")
+    parser.add_argument("--seed", type=int, help="seed for the parameters and the instance")
+    parser.add_argument("-o", "--output", default="testfile")
+    parser.add_argument("--size", type=float, nargs=6, metavar=("FACTORIES", "COUNTRIES", "CHILDREN", "VARIANCE",
+                                                                "MAX_CAP", "MAX_REQUESTS"),
+                        help="fixed parameters instead of random small ones")
+    args = parser.parse_args()
+
+    parameters = None
+    if args.size:
+        factories, countries, children, variance, max_cap, max_requests = args.size
+        parameters = (int(factories), int(countries), int(children), variance, int(max_cap), int(max_requests))
+    generate_random_test_case(args.seed, args.output, parameters)
@@ -0,0 +1,62 @@
+class WorkerError(Exception):
+    """A request that did not come back: it raised in the worker, overran its timeout or the
+    worker died. timed_out tells a timeout apart from the other two."""
+
+    def __init__(self, message, timed_out=False):
+        super().__init__(message)
+        self.timed_out = timed_out
+
+
+def _worker_loop(conn, handle, engine, solver):
+    # Runs in the worker process: PuLP and the solver modules are imported once, then reused
+    from proj23 import preload
+
+    preload(engine, solver)
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            return
+        try:
+            conn.send((True, handle(request)))
+        except Exception as error:
+            conn.send((False, f"{type(error).__name__}: {error}"))
+
+
+class WarmWorker:
+    """One warm solver process behind a pipe; replaced when a request overruns its timeout.
+
+    handle (a module-level function, so a spawn context can pickle it) runs every request in
+    the worker, after the modules for engine and solver are preloaded.
+    """
+
+    def __init__(self, context, handle, engine, solver):
+        self.context = context
+        self.args = (handle, engine, solver)
+        self.start()
+
+    def start(self):
+        self.conn, child_conn = self.context.Pipe()
+        self.process = self.context.Process(target=_worker_loop, args=(child_conn, *self.args), daemon=True)
+        self.process.start()
+        child_conn.close()
+
+    def call(self, request, timeout):
+        """handle(request) as run in the worker; raises WorkerError when it does not come back."""
+        self.conn.send(request)
+        if self.conn.poll(timeout):
+            try:
+                ok, reply = self.conn.recv()
+            except (EOFError, OSError):
+                error = WorkerError("worker exited")
+            else:
+                if ok:
+                    return reply
+                raise WorkerError(reply)
+        else:
+            error = WorkerError(f"timeout after {timeout:g} s", timed_out=True)
+        # The process is stuck or gone: kill it and start a fresh one
+        self.process.kill()
+        self.process.join()
+        self.start()
+        raise error